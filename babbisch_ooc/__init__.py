@@ -3,22 +3,24 @@ import os.path
 import re
 from collections import defaultdict
 from operator import itemgetter
+from optparse import OptionParser
 
-import yaml
-
-try:
-    import simplejson as json
-except ImportError:
-    import json
-
-from babbisch.tag import translate, parse_string
 from babbisch.odict import odict
 
 from .wraplib.codegen import Codegen
 from .wraplib.ooc import Cover, Method, Function, Attribute, Class, Enum, Property
 from .types import TYPE_MAP
 from .names import oocize_name, oocize_type, get_common_prefix
+from .loader import load_files
+from .objects import Primitive, Struct, Union
+from .store import ObjectStore
+from .tags import (parse_tag, first_argument, subtags, referenced_tags, object_types,
+                   find_embedded_compound, TypedefIndex)
+from .filters import PatternFilter
+from .stats import Stats, NullStats
+from . import names
 from . import oo
+from . import cachedir
 
 IGNORED_HEADERS = map(re.compile,
     [
@@ -53,18 +55,48 @@ class PropertyInfo(MemberInfo):
     pass
 
 class OOClient(object):
-    def __init__(self, objects, interface):
+    def __init__(self, objects, interface, render_cache=None, typedefs=None, stats=None):
+        #: :class:`Stats` collecting statistics of this run.
+        if stats is None:
+            stats = NullStats()
+        self.stats = stats
         #: list of header names
         self.headers = []
-        #: odict of babbisch objects.
+        #: :class:`ObjectStore` of babbisch objects.
+        if not isinstance(objects, ObjectStore):
+            objects = ObjectStore(objects)
         self.objects = objects
+        #: :class:`TypedefIndex` of all typedefs in `objects`, used to find opaque types.
+        if typedefs is None:
+            typedefs = TypedefIndex(objects.itervalues())
+        self.typedefs = typedefs
         #: Dictionary containing the user-defined YAML interface.
         self.interface = interface
+        #: Filter of header filenames that should not be included.
+        self.ignored_headers = PatternFilter(IGNORED_HEADERS, memoize=True)
+        self.ignored_headers.extend(interface.get('IgnoredHeaders', ()))
+        #: Filter of tags that should not be wrapped.
+        self.ignored_tags = PatternFilter(IGNORED_TAGS)
+        self.ignored_tags.extend(interface.get('IgnoredTags', ()))
+        #: Filter of header filenames whose objects should be dropped.
+        self.dropped_headers = PatternFilter(interface.get('DropHeaders', ()), memoize=True)
+        #: set of the STRUCT and UNION tags removed by `drop_objects`.
+        self.dropped_compounds = set()
+        #: set of the typedef tags `drop_objects` kept for now.
+        self.dropped_typedefs = set()
+        with stats.phase('drop_objects'):
+            self.drop_objects()
         #: list of script functions
         self.scripts = []
-        self.load_scripts() # load 'em
+        #: Dictionary mapping hook names to lists of script hooks (see :mod:`babbisch_ooc.scripts`).
+        self.hooks = {}
+        with stats.phase('load_scripts'):
+            self.load_scripts() # load 'em
         #: Dictionary mapping tag types to artificial wrapper (ooc) names.
         self.artificial = {}
+        #: Dictionary caching the results of `get_ooc_type`.
+        self._ooc_types = {}
+        self.ooc_type_hits = self.ooc_type_misses = 0
         #: Dictionary mapping entity tags to MemberInfo instances.
         self.methods = {}
         #: Dictionay mapping entity tags to dictionaries mapping property names to MemberInfo instances.
@@ -73,42 +105,104 @@ class OOClient(object):
         self._codegens = odict()
         #: odict {name: codegen} of *all* codegens.
         self.codegens = odict()
+        #: :class:`RenderCache` to reuse wrappers of unchanged objects from, or None.
+        self.render_cache = render_cache
+        #: dictionary mapping tags to (object, cache key) tuples whose wrappers are rendered and cached in `generate_code`.
+        self._uncached = {}
         # fill in all primitive types
         self.create_primitives()
         #: list of all function names whose return codes should be checked
         self.checked_functions = set()
         # do the settings yay
-        oo.apply_settings(self)
+        with stats.phase('apply_settings'):
+            oo.apply_settings(self)
+
+    def drop_objects(self):
+        """
+            Remove all objects declared in headers matched by `DropHeaders`
+            from `self.objects`. They are just not there for any further
+            steps, as if they hadn't been in the babbisch files.
+            They are not even decoded. Only typedefs stay until
+            `handle_opaque_types` knows whether remaining objects use
+            them, and dropped structs and unions that remaining objects
+            contain by value become opaque types there.
+        """
+        if not self.dropped_headers:
+            return
+        dropped = []
+        for tag in self.objects:
+            filename = self.objects.filename(tag)
+            if filename is not None and self.dropped_headers(filename):
+                class_name = self.objects.class_name(tag)
+                if class_name == 'Typedef':
+                    self.dropped_typedefs.add(tag)
+                    continue
+                dropped.append(tag)
+                if class_name in ('Struct', 'Union'):
+                    self.dropped_compounds.add(tag)
+        self.objects.discard(dropped)
 
     def load_scripts(self):
         """
             Load all scripts of da interface!
         """
-        for filename in self.interface.get('Scripts', []):
-            glob, loc = {}, {}
-            execfile(filename, glob, loc)
-            self.scripts.append(loc['process'])
+        filenames = self.interface.get('Scripts', [])
+        if not filenames:
+            return
+        from .scripts import load_script, HOOKS
+        for filename in filenames:
+            namespace = load_script(filename)
+            if 'process' in namespace:
+                self.scripts.append(namespace['process'])
+            for name in HOOKS:
+                if name in namespace:
+                    self.add_hook(name, namespace[name])
+
+    def add_hook(self, name, hook):
+        """
+            Register the callable *hook* for the hook *name*, e.g.
+            ``on_function``.
+        """
+        self.hooks.setdefault(name, []).append(hook)
+
+    def call_hooks(self, name, *args):
+        """
+            Call all hooks registered for *name* with the client and *args*.
+        """
+        for hook in self.hooks.get(name, ()):
+            hook(self, *args)
 
     def process_scripts(self):
         """
             Let the scripts do their stuff!
         """
         for script in self.scripts:
+            # scripts might change the names of anything.
+            self.invalidate_ooc_types()
             script(self)
+        self.invalidate_ooc_types()
+
+    def invalidate_ooc_types(self):
+        """
+            Forget the cached results of `get_ooc_type`. This has to be
+            called whenever `artificial`, `objects` or the ooc names of
+            objects change.
+        """
+        self._ooc_types.clear()
 
     def create_primitives(self):
         """
             update `self.objects`; add primitive types from TYPE_MAP.
         """
         for tag, ooc_name in TYPE_MAP.iteritems():
-            self.objects[tag] = {
-                                'class': 'Primitive',
-                                'tag': tag,
-                                'name': ooc_name,
-                                'ooc_name': ooc_name,
-                                'c_name': tag,
-                                'wrapped': True,
-                                }
+            self.objects[tag] = Primitive(
+                                tag=tag,
+                                name=ooc_name,
+                                ooc_name=ooc_name,
+                                c_name=tag,
+                                wrapped=True,
+                                )
+        self.invalidate_ooc_types()
 
     def add_artificial_cover(self, name, c_type, c_tag, extends=''):
         """
@@ -117,6 +211,7 @@ class OOClient(object):
             over any covers of the same name or of the same type.
         """
         self.artificial[c_tag] = name
+        self.invalidate_ooc_types()
         self._codegens[name] = wrapper = Cover(
             name=name,
             from_=c_type,
@@ -181,11 +276,17 @@ class OOClient(object):
              1) set ``obj['wrapper'] = wrapper``
              2) append *wrapper* to `self.codegens`
              3) set ``obj['wrapped'] = True``
-            If there already is a wrapper of such name, don't do anything.
+            If there already is a wrapper of such name, don't do anything
+            (except for telling the render cache).
         """
         if wrapper.name not in self.codegens:
             obj['wrapper'] = self.codegens[wrapper.name] = wrapper
             obj['wrapped'] = True
+            if self.hooks:
+                self.call_hooks('on_wrapper_created', obj, wrapper)
+        elif self._uncached and 'wrapper' not in obj and obj['tag'] in self._uncached:
+            # cache that, so the next run doesn't generate it again.
+            self.render_cache.shadow(obj['tag'], self._uncached[obj['tag']][1], wrapper.name)
 
     def remove_wrapper(self, codegen):
         """
@@ -226,74 +327,251 @@ class OOClient(object):
             if 'coord' in obj:
                 filename = obj['coord']['file']
                 # check if it should be ignored.
-                ignore = False
-                for pattern in IGNORED_HEADERS:
-                    if pattern.match(filename):
-                        ignore = True
-                if not ignore:
+                if not self.ignored_headers(filename):
                     headers.add(filename)
-        # Generate code.
+        self.codegens['!headers'] = self.generate_header_code(headers)
+
+    def generate_header_code(self, headers):
+        """
+            Return the code including the header files *headers*.
+        """
         code = []
         for header in headers:
             name = os.path.splitext(header)[0]
             code.append('include %s' % name)
         code.append('')
-        self.codegens['!headers'] = code
-
-    def run(self):
+        return code
+
+    #: Names of the methods `run` calls, in this order, before generating code.
+    STAGES = (
+        'prune',
+        'merge_codegens',
+        'handle_opaque_types',
+        'traverse',
+        'handle_properties',
+        'handle_errors',
+        'process_scripts',
+    )
+
+    def run(self, out=None, jobs=1):
         """
             Run the binding generator.
 
-            Generating object oriented bindings is done in these steps:
+            Generating object oriented bindings is done in these steps
+            (see `STAGES`):
+
+             1) Remove unreachable objects, if wanted (:meth:`prune`)
+             2) Merge artificial wrappers (:meth:`merge_codegens`)
+             3) Create fake types for opaque types (:meth:`handle_opaque_types`)
+             4) Walk all objects once, creating names, collecting header
+                files and generating code for types and functions
+                (:meth:`traverse`)
+             5) Handle properties!
+             6) Handle errors!
+             7) Process scripts!
+             8) Generate aaaaallllll code and write it to *out* or, if
+                *out* is None, return it as string. Up to *jobs*
+                processes render it.
 
-             1) Collect header files and merge artificial wrappers.
-             2) Create ooc names for all objects (:meth:`create_ooc_names`)
-             3) Create C names for all objects (:meth:`create_c_name`)
-             4) Generate code for types (structs, unions, enums, typedefs)
-             5) Generate code for functions
-             6) Handle properties!
-             7) Handle errors!
-             8) Process scripts!
-             9) Generate aaaaallllll code and return it as string.
+        """
+        self.prepare()
+        with self.stats.phase('generate_code'):
+            code = self.generate_code(out, jobs)
+        self.collect_stats()
+        return code
 
+    def prepare(self):
         """
-        self.collect_headers()
+            Run all `STAGES`, so that `self.codegens` is ready to be
+            rendered.
+        """
+        for stage in self.STAGES:
+            with self.stats.phase(stage):
+                getattr(self, stage)()
+
+    def collect_stats(self):
+        """
+            Record object counts and cache hit rates in `self.stats`,
+            if it records anything.
+        """
+        stats = self.stats
+        if not stats.enabled:
+            return
+        classes = defaultdict(int)
+        for tag in self.objects:
+            classes[self.objects.class_name(tag)] += 1
+        stats.count('objects', len(self.objects))
+        for class_name, count in classes.iteritems():
+            stats.count('objects.%s' % class_name, count)
+        stats.count('objects_decoded_on_demand', self.objects.decoded)
+        stats.count('methods', len(self.methods))
+        stats.count('properties', sum(map(len, self.properties.itervalues())))
+        stats.count('checked_functions', len(self.checked_functions))
+        stats.count('codegens', len(self.codegens))
+        stats.cache('get_ooc_type', self.ooc_type_hits, self.ooc_type_misses)
+        stats.cache('oocize_name', names.oocize_name.hits, names.oocize_name.misses)
+        stats.cache('oocize_type', names.oocize_type.hits, names.oocize_type.misses)
+        stats.cache('ignored_headers', self.ignored_headers.hits, self.ignored_headers.misses)
+        if self.render_cache is not None:
+            stats.cache('render_cache', self.render_cache.hits, self.render_cache.misses)
+
+    def prune(self):
+        """
+            If the interface says ``Prune: true``, remove all types from
+            `self.objects` that can't be reached from a function or from
+            the tag of an entry in `Objects`, following argument, return,
+            member and typedef target types. If ``Prune`` is a list of
+            regular expressions, only functions with matching names are
+            roots (and all others are removed), along with the functions
+            bound as methods, properties or checked functions.
+            Primitives always stay.
+        """
+        setting = self.interface.get('Prune', False)
+        if not setting:
+            return
+        objects = self.objects
+        roots = set()
+        if setting is True:
+            function_filter = None
+        else:
+            function_filter = PatternFilter(setting)
+            roots.update(self.methods)
+            roots.update(self.checked_functions)
+            for properties in self.properties.itervalues():
+                for info in properties.itervalues():
+                    roots.add(info.getter)
+                    roots.add(info.setter)
+        for tag in objects:
+            if (objects.class_name(tag) == 'Function' and not self.is_ignored_tag(tag)
+                and (function_filter is None or function_filter(tag))):
+                roots.add(tag)
+        for info in self.interface.get('Objects', {}).itervalues():
+            roots.update(subtags(info['tag']))
+        reachable = self.find_reachable(roots)
+        pruned = [tag for tag in objects
+                  if tag not in reachable and objects.class_name(tag) != 'Primitive']
+        objects.discard(pruned)
+        self.stats.count('pruned_objects', len(pruned))
+        self.invalidate_ooc_types()
+
+    def find_reachable(self, roots):
+        """
+            Return the set of tags of all objects reachable from the tags
+            *roots*. Only the reachable objects are decoded.
+        """
+        objects = self.objects
+        reachable = set()
+        stack = [tag for tag in roots if tag in objects]
+        while stack:
+            tag = stack.pop()
+            if tag in reachable:
+                continue
+            reachable.add(tag)
+            for referenced in referenced_tags(objects[tag]):
+                if referenced in objects and referenced not in reachable:
+                    stack.append(referenced)
+        return reachable
+
+    def merge_codegens(self):
+        """
+            Add the (not yet filled) header codegen and the artificial
+            wrappers to `self.codegens`, so they come first.
+        """
+        self.codegens['!headers'] = []
         self.codegens.update(self._codegens)
-        self.handle_opaque_types()
-        self.create_ooc_names()
-        self.create_c_names()
-        self.generate_types()
-        self.generate_functions()
-        self.handle_properties()
-        self.handle_errors()
-        self.process_scripts()
-        return self.generate_code()
 
-    def generate_code(self):
+    def traverse(self):
+        """
+            Do in one walk over `self.objects` what `create_ooc_names`,
+            `create_c_names`, `collect_headers`, `generate_types` and
+            `generate_functions` do in one walk each:
+
+            Every object gets its names, its header is collected and its
+            wrapper is generated if it's a type. Functions are generated
+            after all types, in their original order. The script hooks of
+            every generated object are called right after its wrapper is
+            generated.
+        """
+        headers = set()
+        functions = []
+        for tag, obj in self.objects.iteritems():
+            self._visit(tag, obj, headers, functions)
+        for obj in functions:
+            self.generate_function(obj)
+            if self.hooks:
+                self.call_hooks('on_function', obj)
+        self.codegens['!headers'][:] = self.generate_header_code(headers)
+
+    def _visit(self, tag, obj, headers, functions):
+        """
+            Visit the object *obj* for `traverse`.
+        """
+        self.ensure_names(obj)
+        if 'coord' in obj:
+            filename = obj['coord']['file']
+            if not self.ignored_headers(filename):
+                headers.add(filename)
+        cls = obj['class']
+        if cls == 'Function':
+            if not self.is_ignored_tag(tag):
+                functions.append(obj)
+            return
+        elif cls == 'Typedef':
+            # `generate_typedef` needs the names of the target, which
+            # might come later.
+            target = obj['target']
+            if target in self.objects:
+                self.ensure_names(self.objects[target])
+        if not self.is_ignored_tag(tag):
+            self.generate_type(obj)
+            if self.hooks:
+                from .scripts import CLASS_HOOKS
+                if cls in CLASS_HOOKS:
+                    self.call_hooks(CLASS_HOOKS[cls], obj)
+
+    def generate_code(self, out=None, jobs=1):
+        """
+            Write the generated code to the file-like object *out*, line
+            by line. If *out* is None, return the generated code as string.
+            If *jobs* is greater than 1, the code is rendered by that many
+            processes (see :mod:`babbisch_ooc.render`).
+        """
+        codegen = Codegen(out)
+        if jobs > 1:
+            from . import render
+            render.render_parallel(self, codegen, self.codegens.values(), jobs)
+        else:
+            self.render(codegen, self.codegens.values())
+        if out is None:
+            return codegen.buf
+
+    def render(self, codegen, wrappers):
         """
-            Return the generated code as string.
+            Render the list of codegens *wrappers* using the
+            :class:`Codegen` *codegen*, storing the code of render cache
+            misses in the render cache.
         """
-        return Codegen()(self.codegens.values()).buf
+        if self.render_cache is None:
+            codegen(wrappers)
+            return
+        # render the wrappers of cache misses one by one to store them.
+        uncached = {}
+        for tag, (obj, key) in self._uncached.iteritems():
+            if 'wrapper' in obj:
+                uncached[id(obj['wrapper'])] = (tag, key)
+        for wrapper in wrappers:
+            if id(wrapper) in uncached:
+                tag, key = uncached[id(wrapper)]
+                codegen.write(self.render_cache.store(tag, key, wrapper))
+            else:
+                codegen(wrapper)
 
     def get_opaque_types(self):
         """
-            yield tags of opaque (i.e. unknown) types.
-        """
-        for obj in self.objects.copy().itervalues():
-            # only handle typedefs ...
-            if obj['class'] == 'Typedef':
-                # get the first, typedef tag
-                tag = obj['target']
-                while '(' in tag:
-                    mod, args = parse_string(tag)
-                    # is it wrapping a struct or union that is unknown?
-                    if (mod in ('STRUCT', 'UNION')
-                        and tag not in self.objects):
-                        # then it's opaque.
-                        yield tag
-                        break
-                    # proceed.
-                    tag = translate(args[0])
+            yield tags of opaque (i.e. unknown) types: structs and unions
+            that typedefs refer to, but that are not in `self.objects`.
+        """
+        return self.typedefs.iter_unknown(self.objects)
 
     def handle_properties(self):
         # Properties?
@@ -311,17 +589,54 @@ class OOClient(object):
         for function_name, wrapper in wrappers:
             oo.errorize_function(self, function_name, wrapper)
 
+    def get_embedded_dropped_types(self):
+        """
+            return a set of the tags of dropped structs and unions (see
+            `drop_objects`) that objects in `self.objects` still contain
+            by value, i.e. not through a pointer.
+        """
+        embedded = set()
+        for tag, obj in self.objects.iteritems():
+            for type in object_types(obj):
+                compound = find_embedded_compound(type)
+                if compound in self.dropped_compounds and compound not in self.objects:
+                    embedded.add(compound)
+        return embedded
+
+    def discard_dropped_typedefs(self):
+        """
+            Remove the typedefs of dropped headers (see `drop_objects`)
+            from `self.objects`, except for those the other objects refer
+            to (directly or through other typedefs), so their types stay
+            intact.
+        """
+        dropped = self.dropped_typedefs
+        pending = [self.objects[tag] for tag in self.objects if tag not in dropped]
+        used = set()
+        while pending:
+            obj = pending.pop()
+            for tag in referenced_tags(obj):
+                if tag in dropped and tag not in used and tag in self.objects:
+                    used.add(tag)
+                    pending.append(self.objects[tag])
+        self.objects.discard(dropped.difference(used))
+
     def handle_opaque_types(self):
-        for tag in self.get_opaque_types():
-            mod, args = parse_string(tag)
+        if self.dropped_typedefs:
+            self.discard_dropped_typedefs()
+        opaque = list(self.get_opaque_types())
+        if self.dropped_compounds:
+            opaque.extend(self.get_embedded_dropped_types().difference(opaque))
+        for tag in opaque:
+            mod, args = parse_tag(tag)
             # just create a "fake type".
-            self.objects[tag] = {
-                'tag': tag,
-                'class': {'STRUCT': 'Struct', 'UNION': 'Union'}[mod],
-                'name': args[0], # TODO?
-                'members': [],
-                'opaque': True,
-            }
+            self.objects[tag] = {'STRUCT': Struct, 'UNION': Union}[mod](
+                tag=tag,
+                name=args[0], # TODO?
+                members=[],
+                opaque=True,
+            )
+        self.invalidate_ooc_types()
 #            if mod == 'STRUCT':
 #                self.generate_struct(obj)
 #            else:
@@ -332,6 +647,21 @@ class OOClient(object):
             get the ooc type from the tag *tag*. It might be nested.
             And might be a pointer. Or an array. Whatever! It can
             be *anything*!
+
+            The results are cached, see `invalidate_ooc_types`.
+        """
+        try:
+            ooc_type = self._ooc_types[tag]
+        except KeyError:
+            self.ooc_type_misses += 1
+            ooc_type = self._ooc_types[tag] = self._resolve_ooc_type(tag)
+            return ooc_type
+        self.ooc_type_hits += 1
+        return ooc_type
+
+    def _resolve_ooc_type(self, tag):
+        """
+            Do the actual work for `get_ooc_type`.
         """
         # is it artificial? if yes, we already have a type.
         if tag in self.artificial:
@@ -341,49 +671,39 @@ class OOClient(object):
             return 'Int'
         # is it a real object?
         elif tag in self.objects:
-            return self.objects[tag]['ooc_name']
+            obj = self.objects[tag]
+            self.ensure_names(obj)
+            return obj['ooc_name']
         # nope. :(
         else:
             if '(' in tag:
-                mod, args = parse_string(tag)
-                
-                def _pointer():
-                    # A pointer to a function type is a Func.
-                    try:
-                        if args[0][0] == 'FUNCTIONTYPE':
-                            return 'Func'
-                    except IndexError:
-                        pass
-                    try:
-                        return self.get_ooc_type(translate(args[0])) + '*'
-                    except WTFError:
-                        # That might work well for unknown types.
-                        # TODO: print a message to stderr
-                        return 'Pointer'
-
-                def _const():
-                    return 'const %s' % self.get_ooc_type(translate(args[0]))
-
-                def _array():
-                    # TODO: that looks incorrect.
-                    return self.get_ooc_type(translate(args[0])) + '*'
-
-                def _ignore():
-                    return self.get_ooc_type(translate(args[0]))
-
-                def _functiontype():
-                    return 'Func' # TODO: correct?
-
+                mod, args = parse_tag(tag)
                 try:
-                    return {
-                        'POINTER': _pointer,
-                        'CONST': _const,
-                        'ARRAY': _array,
-                        'FUNCTIONTYPE': _functiontype,
+                    if mod == 'POINTER':
+                        # A pointer to a function type is a Func.
+                        try:
+                            if args[0][0] == 'FUNCTIONTYPE':
+                                return 'Func'
+                        except IndexError:
+                            pass
+                        try:
+                            return self.get_ooc_type(first_argument(tag)) + '*'
+                        except WTFError:
+                            # That might work well for unknown types.
+                            # TODO: print a message to stderr
+                            return 'Pointer'
+                    elif mod == 'CONST':
+                        return 'const %s' % self.get_ooc_type(first_argument(tag))
+                    elif mod == 'ARRAY':
+                        # TODO: that looks incorrect.
+                        return self.get_ooc_type(first_argument(tag)) + '*'
+                    elif mod == 'FUNCTIONTYPE':
+                        return 'Func' # TODO: correct?
+                    elif mod in ('VOLATILE', 'RESTRICT'):
                         # Ignore `volatile` + `restrict` storage type.
-                        'VOLATILE': _ignore,
-                        'RESTRICT': _ignore,
-                    }[mod]()
+                        return self.get_ooc_type(first_argument(tag))
+                    else:
+                        raise KeyError(mod)
                 except KeyError:
                     raise WTFError('WTF tag is this? %r' % tag)
             else:
@@ -450,7 +770,7 @@ class OOClient(object):
         """
         # For structs and unions, it's just "struct %s" or "enum %s"
         if obj['class'] in ('Struct', 'Union', 'Enum'):
-            mod, args = parse_string(obj['tag'])
+            mod, args = parse_tag(obj['tag'])
 
             # Is it unnamed?
             if args[0].startswith('!Unnamed'):
@@ -488,6 +808,18 @@ class OOClient(object):
         else:
             raise WTFError('Unknown type: %r' % obj)
 
+    def ensure_names(self, obj):
+        """
+            Create the ooc and C names of *obj* (see `create_ooc_names`
+            and `create_c_names`) unless it already has them.
+        """
+        if obj['class'] != 'Primitive' and 'ooc_name' not in obj:
+            obj['ooc_name'] = self.generate_ooc_name(obj)
+            try:
+                obj['c_name'] = self.generate_c_name(obj)
+            except NamingImpossibleError:
+                obj['c_name'] = None
+
     def create_ooc_names(self):
         """
             Generate ooc-suitable names for all objects in `self.objects`
@@ -500,6 +832,7 @@ class OOClient(object):
                 # generate a name for it and save it.
                 name = self.generate_ooc_name(obj)
                 obj['ooc_name'] = name
+        self.invalidate_ooc_types()
 
     def create_c_names(self):
         """
@@ -520,9 +853,10 @@ class OOClient(object):
 
     def is_ignored_tag(self, tag):
         """
-            Return True if *tag* should not be wrapped because `IGNORED_TAGS` says so.
+            Return True if *tag* should not be wrapped because `IGNORED_TAGS`
+            or the `IgnoredTags` of the interface say so.
         """
-        return any(r.match(tag) for r in IGNORED_TAGS)
+        return self.ignored_tags(tag)
 
     def generate_types(self):
         """
@@ -541,11 +875,35 @@ class OOClient(object):
             if (obj['class'] == 'Function' and not self.is_ignored_tag(tag)):
                 self.generate_function(obj)
 
+    def generate_cached(self, obj):
+        """
+            If the wrapper of *obj* was rendered in an earlier run and
+            nothing it depends on has changed since, add the cached code
+            as its wrapper and return True. Otherwise, return False; the
+            wrapper generated instead will be cached in `generate_code`.
+            Caching is disabled if there are scripts, because they may
+            modify any wrapper.
+        """
+        if self.render_cache is None or self.scripts or self.hooks:
+            return False
+        key = self.render_cache.object_key(self, obj)
+        if key is None:
+            return False
+        wrapper = self.render_cache.lookup(obj['tag'], key, self.codegens)
+        if wrapper is None:
+            self._uncached[obj['tag']] = (obj, key)
+            return False
+        if wrapper is not True:
+            self.add_wrapper(obj, wrapper)
+        return True
+
     def generate_function(self, obj, force=False):
         """
             generate the code for this function!
             :param force: used if we need a simple 1:1 wrapper without method / name mangling stuff
         """
+        if not force and self.generate_cached(obj):
+            return
         name = oocize_name(obj['name']) if not force else obj['name']
         if obj['name'] == name:
             mod = 'extern'
@@ -591,6 +949,8 @@ class OOClient(object):
             the key ``codegen``, and to `self.codegens`, connected to the
             actual ooc type name (``obj['ooc_name']``).
         """
+        if self.generate_cached(obj):
+            return
         {
             'Struct': self.generate_struct,
             'Union': self.generate_union,
@@ -688,23 +1048,127 @@ class OOClient(object):
             wrapper.add_value(name, str(value))
         self.add_wrapper(obj, wrapper)
 
+#: Buffer size of the output file (see the ``--output`` option).
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+def load_interface(f):
+    """
+        Read the YAML interface from the file object *f* and return it.
+        The YAML modules (and the C loader, if available) are only
+        imported here, and learn the ``!by_name`` and ``!by_tag`` tags.
+    """
+    import yaml
+    loader = getattr(yaml, 'CLoader', yaml.Loader)
+    if u'!by_name' not in loader.yaml_constructors:
+        oo.register_constructors(loader)
+    return yaml.load(f, Loader=loader)
+
+def make_parser():
+    """
+        Return the :class:`OptionParser` of the command line interface.
+    """
+    parser = OptionParser(usage='%prog [options] interface.yaml\n'
+                                '       %prog [options] --batch MANIFEST\n'
+                                '       %prog --serve SOCKET')
+    parser.add_option('-o', '--output', dest='output', metavar='FILE',
+            help='write the bindings to FILE instead of stdout')
+    parser.add_option('-j', '--jobs', dest='jobs', type='int', metavar='N',
+            default=1,
+            help='use up to N processes for loading, rendering and writing '
+                 'shards (default: 1)')
+    parser.add_option('--render-cache', dest='render_cache', metavar='FILE',
+            help='reuse the code of unchanged objects from FILE and update it')
+    parser.add_option('--shard', dest='shard', action='store_true', default=False,
+            help='write one module per C header to a directory next to the '
+                 'output file, which imports them all (requires -o)')
+    parser.add_option('--no-json-cache', dest='json_cache', action='store_false', default=True,
+            help="don't read or write binary caches of the babbisch json files")
+    parser.add_option('--cache-dir', dest='cache_dir', metavar='DIR',
+            help='keep the caches of json files and scripts in DIR '
+                 '(default: $XDG_CACHE_HOME/babbisch-ooc)')
+    parser.add_option('--prune', dest='prune', action='store_true', default=False,
+            help="only wrap types reachable from functions and Objects "
+                 "(same as 'Prune: true' in the interface)")
+    parser.add_option('--stats', dest='stats', metavar='FILE',
+            help='write timing, memory and cache statistics to FILE (json)')
+    parser.add_option('--batch', dest='batch', metavar='MANIFEST',
+            help='generate the bindings for all interfaces listed in the '
+                 'YAML file MANIFEST, loading every json file only once')
+    parser.add_option('--serve', dest='serve', metavar='SOCKET',
+            help='keep the babbisch objects in memory and generate bindings '
+                 'for the requests of --connect on the unix socket SOCKET')
+    parser.add_option('--connect', dest='connect', metavar='SOCKET',
+            help='let the --serve process on SOCKET do the work (requires -o)')
+    return parser
+
 def main():
-    interface = None
-    try:
-        filename = sys.argv[1]
-    except IndexError:
-        print 'Usage: babbisch-ooc interface.yaml'
+    parser = make_parser()
+    options, args = parser.parse_args()
+    if options.cache_dir is not None:
+        cachedir.set_directory(os.path.abspath(options.cache_dir))
+    if options.serve is not None:
+        if args:
+            parser.error("--serve doesn't take an interface")
+        from . import daemon
+        return daemon.serve(options.serve, options.json_cache)
+    if options.batch is not None:
+        if args:
+            parser.error("--batch doesn't take an interface")
+        from . import batch
+        return batch.run_manifest(options.batch, options)
+    if len(args) != 1:
+        parser.print_usage()
         return 1
-
-    with open(filename, 'r') as f:
-        interface = yaml.load(f)
-    # load all objects
-    objects = odict()
-    for filename in interface.get('Files', ()):
+    filename = args[0]
+    if options.shard and options.output is None:
+        parser.error('--shard requires -o')
+    if options.connect is not None:
+        if options.output is None:
+            parser.error('--connect requires -o')
+        from . import daemon
+        return daemon.connect(options.connect, filename, options)
+    stats = Stats() if options.stats is not None else NullStats()
+
+    with stats.phase('yaml'):
         with open(filename, 'r') as f:
-            objects.update(json.load(f))
+            interface = load_interface(f)
+    # load all objects
+    with stats.phase('load'):
+        typedefs = TypedefIndex()
+        objects = load_files(interface.get('Files', ()), options.jobs, typedefs,
+                             options.json_cache)
+    return generate(interface, objects, typedefs, options, stats)
+
+def generate(interface, objects, typedefs, options, stats):
+    """
+        Generate the bindings for *interface* from the loaded *objects*
+        (see `load_files`) as the command line *options* say. Return the
+        exit code.
+    """
+    if options.prune:
+        interface.setdefault('Prune', True)
+    render_cache = None
+    if options.render_cache is not None:
+        from .cache import RenderCache
+        render_cache = RenderCache(options.render_cache)
     # create an oo client
-    client = OOClient(objects, interface)
-    print client.run()
-
-
+    client = OOClient(objects, interface, render_cache, typedefs, stats)
+    if options.output is None:
+        client.run(sys.stdout, options.jobs)
+        # ``print client.run()`` used to end the output with a newline.
+        sys.stdout.write('\n')
+    elif options.shard:
+        from . import shards
+        client.prepare()
+        with stats.phase('write_shards'):
+            shards.write_shards(client, options.output, options.jobs)
+        client.collect_stats()
+    else:
+        with open(options.output, 'w', OUTPUT_BUFFER_SIZE) as out:
+            client.run(out, options.jobs)
+            out.write('\n')
+    if render_cache is not None:
+        render_cache.save()
+    if options.stats is not None:
+        stats.write(options.stats)
+    return 0
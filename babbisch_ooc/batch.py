@@ -0,0 +1,108 @@
+"""
+    Batch mode: ``babbisch-ooc --batch manifest.yaml`` generates the
+    bindings for many interfaces at once. The manifest is a list of
+    mappings with the keys ``interface`` and ``output`` (and optionally
+    ``render_cache``, ``shard``, ``prune`` and ``stats``, overriding the
+    command line options)::
+
+        - interface: glib.yaml
+          output: glib.ooc
+        - interface: gtk.yaml
+          output: gtk.ooc
+          shard: true
+
+    Every json file is decoded and every script is compiled once. Then
+    a pool of up to ``--jobs`` processes handles the interfaces, one
+    fresh process per interface that inherits the decoded objects through fork. So the objects are
+    shared copy-on-write and the changes one interface makes to them
+    never show up in another.
+"""
+import os
+import sys
+import traceback
+from optparse import Values
+
+from .loader import FileCache
+from .scripts import compile_script
+
+#: Manifest keys that override command line options.
+OPTION_KEYS = ('output', 'render_cache', 'shard', 'prune', 'stats')
+
+# The files, interfaces and options the forked workers operate on.
+_files = None
+_tasks = None
+
+def _run_task(index):
+    """
+        Generate the bindings for the task at *index* of `_tasks`. Return
+        the exit code and the traceback, if any.
+    """
+    from . import generate, Stats, NullStats
+    interface, filenames, options = _tasks[index]
+    try:
+        stats = Stats() if options.stats is not None else NullStats()
+        objects, typedefs = _files.load(filenames)
+        return generate(interface, objects, typedefs, options, stats), None
+    except Exception:
+        return 1, traceback.format_exc()
+
+def read_manifest(filename, options):
+    """
+        Read the manifest *filename* and return a list of
+        (interface filename, options) tuples, based on the command line
+        *options*.
+    """
+    from . import load_interface
+    with open(filename, 'r') as f:
+        manifest = load_interface(f)
+    entries = []
+    for entry in manifest:
+        entry_options = Values(vars(options))
+        # each interface is handled by one process.
+        entry_options.jobs = 1
+        for key in OPTION_KEYS:
+            if key in entry:
+                setattr(entry_options, key, entry[key])
+        if entry_options.output is None:
+            raise ValueError('No output for %s in the manifest' % entry['interface'])
+        entries.append((entry['interface'], entry_options))
+    return entries
+
+def run_manifest(filename, options):
+    """
+        Generate the bindings for all interfaces in the manifest
+        *filename* with the command line *options*. Return the exit code.
+    """
+    global _files, _tasks
+    from . import load_interface
+    files = FileCache(options.json_cache)
+    tasks = []
+    for interface_filename, entry_options in read_manifest(filename, options):
+        with open(interface_filename, 'r') as f:
+            interface = load_interface(f)
+        filenames = [os.path.abspath(name) for name in interface.get('Files', ())]
+        files.refresh(filenames)
+        for script in interface.get('Scripts', ()):
+            compile_script(script)
+        tasks.append((interface, filenames, entry_options))
+
+    import multiprocessing
+    _files, _tasks = files, tasks
+    try:
+        # a fresh process per interface, so it gets a clean copy.
+        pool = multiprocessing.Pool(max(1, min(options.jobs, len(tasks))),
+                                    maxtasksperchild=1)
+        try:
+            results = pool.map(_run_task, range(len(tasks)), chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        _files = _tasks = None
+    status = 0
+    for (interface, filenames, entry_options), (code, error) in zip(tasks, results):
+        if error is not None:
+            print >>sys.stderr, 'babbisch-ooc: %s failed:' % entry_options.output
+            sys.stderr.write(error)
+        status = status or code
+    return status
@@ -0,0 +1,166 @@
+"""
+    Incremental regeneration: The rendered code of a wrapper is stored on
+    disk per object tag, together with a hash of everything the wrapper
+    depends on, i.e. the babbisch object itself and the ooc names of all
+    types it references (which is where the `Names` and `Objects`
+    sections of the interface come in). If that hash is unchanged in the
+    next run, the stored code is reused instead of generating and
+    rendering the wrapper again. Objects that don't get a wrapper because
+    another one has the same name are remembered as well.
+"""
+import os
+import hashlib
+import cPickle as pickle
+
+from .wraplib.codegen import Codegen, CodegenBase
+
+#: Bump this whenever the generated code changes for the same input.
+CACHE_VERSION = 2
+
+class CachedCodegen(CodegenBase):
+    """
+        Stand-in for a wrapper whose code was rendered in an earlier run.
+    """
+    def __init__(self, name, lines):
+        self.name = name
+        self.lines = lines
+
+    def generate_code(self):
+        return self.lines
+
+def object_key(client, obj):
+    """
+        Return the cache key of the babbisch object *obj*, or None if
+        its wrapper can't be cached. That is the case for objects without
+        wrappers and for functions that end up in a class or are checked
+        for errors, because their code is modified after generation.
+    """
+    cls = obj['class']
+    if cls == 'Function':
+        if (obj['tag'] in client.methods
+            or obj['name'] in client.checked_functions):
+            return None
+        inputs = (
+            obj['name'],
+            tuple((name, client.get_ooc_type(type)) for name, type in obj['arguments']),
+            obj['varargs'],
+            client.get_ooc_type(obj['rettype']),
+        )
+    elif cls == 'Struct':
+        inputs = (
+            obj['ooc_name'],
+            obj['c_name'],
+            tuple((name, client.get_ooc_type(type)) for name, type, bitsize in obj['members']),
+        )
+    elif cls == 'Union':
+        inputs = (
+            obj['ooc_name'],
+            obj['c_name'],
+            tuple((name, client.get_ooc_type(type)) for name, type in obj['members']),
+        )
+    elif cls == 'Enum':
+        inputs = (
+            obj['ooc_name'],
+            obj['c_name'],
+            obj['name'],
+            tuple(tuple(member) for member in obj['members']),
+        )
+    elif cls == 'Typedef':
+        target = obj['target']
+        if client.is_wrapped(target):
+            target_obj = client.objects[target]
+            target_inputs = (True, target_obj['class'], target_obj['ooc_name'])
+        elif target in client.objects:
+            target_inputs = (False, client.objects[target]['c_name'])
+        else:
+            target_inputs = (False, client.get_ooc_type(target))
+        inputs = (obj['ooc_name'], target_inputs)
+    else:
+        return None
+    return hashlib.sha1(repr((CACHE_VERSION, cls, inputs))).hexdigest()
+
+class RenderCache(object):
+    """
+        On-disk mapping of object tags to the object key (see
+        :func:`object_key`), the name and the rendered lines of the
+        wrapper.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        #: dictionary mapping tags to (key, name, lines) tuples.
+        self.entries = {}
+        #: entries that were looked up or stored in this run.
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        """
+            Load the entries from disk. A missing, unreadable or outdated
+            cache file is ignored.
+        """
+        try:
+            with open(self.filename, 'rb') as f:
+                version, entries = pickle.load(f)
+        except (IOError, EOFError, ValueError, pickle.UnpicklingError):
+            return
+        if version == CACHE_VERSION:
+            self.entries = entries
+
+    def save(self):
+        """
+            Write all entries used in this run to disk. Entries of objects
+            that are gone (or changed) are dropped.
+        """
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            pickle.dump((CACHE_VERSION, self.used), f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_filename, self.filename)
+
+    def object_key(self, client, obj):
+        """
+            Return the key of *obj*, see :func:`object_key`.
+        """
+        return object_key(client, obj)
+
+    def lookup(self, tag, key, codegens):
+        """
+            Return the entry of *tag* if its key is *key*, or None. That
+            is a :class:`CachedCodegen`, or True if the object had no
+            wrapper of its own because the odict *codegens* already had
+            one of that name (see :meth:`shadow`), which must still be
+            the case.
+        """
+        entry = self.entries.get(tag)
+        if entry is None or entry[0] != key:
+            self.misses += 1
+            return None
+        stored_key, name, lines = entry
+        if lines is None:
+            if name not in codegens:
+                self.misses += 1
+                return None
+            wrapper = True
+        else:
+            wrapper = CachedCodegen(name, lines)
+        self.used[tag] = entry
+        self.hits += 1
+        return wrapper
+
+    def store(self, tag, key, codegen):
+        """
+            Render *codegen*, store the result for *tag* with the key
+            *key* and return the rendered code as string.
+        """
+        code = Codegen()(codegen).buf
+        # every line ends with a newline; Codegen adds them again.
+        self.used[tag] = (key, codegen.name, code.split('\n')[:-1])
+        return code
+
+    def shadow(self, tag, key, name):
+        """
+            Remember that the object *tag* with the key *key* got no
+            wrapper because there already was one called *name*.
+        """
+        self.used[tag] = (key, name, None)
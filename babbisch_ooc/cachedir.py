@@ -0,0 +1,59 @@
+"""
+    The directory babbisch-ooc keeps its caches of json files and scripts
+    in, so that source trees stay clean and read-only inputs work. It is
+    ``--cache-dir`` if given, else ``$XDG_CACHE_HOME/babbisch-ooc``
+    (``~/.cache/babbisch-ooc`` by default).
+
+    Every input file gets its own cache file there, named after its
+    basename and a hash of its absolute path (``api.json`` ->
+    ``api.json-0123456789abcdef.bcache``).
+"""
+import os
+
+# The directory set with `set_directory`, or None for the default.
+_directory = None
+
+def set_directory(directory):
+    """
+        Use *directory* for all caches from now on (None means the
+        default directory).
+    """
+    global _directory
+    _directory = directory
+
+def get_directory():
+    """
+        Return the cache directory.
+    """
+    if _directory is not None:
+        return _directory
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'babbisch-ooc')
+
+def cache_filename(filename, suffix):
+    """
+        Return the name of the cache file with the extension *suffix* for
+        the input file *filename*.
+    """
+    import hashlib
+    filename = os.path.abspath(filename)
+    if isinstance(filename, unicode):
+        digest = hashlib.sha1(filename.encode('utf-8'))
+    else:
+        digest = hashlib.sha1(filename)
+    return os.path.join(get_directory(),
+                        '%s-%s%s' % (os.path.basename(filename), digest.hexdigest()[:16], suffix))
+
+def ensure_directory():
+    """
+        Create the cache directory if it doesn't exist. Return False if
+        that failed.
+    """
+    directory = get_directory()
+    if os.path.isdir(directory):
+        return True
+    try:
+        os.makedirs(directory)
+    except OSError:
+        return os.path.isdir(directory)
+    return True
@@ -0,0 +1,160 @@
+"""
+    Daemon mode: ``babbisch-ooc --serve SOCKET`` keeps the babbisch
+    objects of all json files it has seen in memory and listens on the
+    unix socket SOCKET. ``babbisch-ooc --connect SOCKET interface.yaml
+    -o out.ooc`` sends a request there instead of doing the work itself.
+
+    For every request, the daemon reads the interface, reloads the json
+    files and recompiles the scripts that changed since the last time
+    and forks. The child builds the bindings from its copy-on-write view
+    of the objects, so whatever it does to them doesn't affect the daemon
+    or other requests.
+
+    Requests and replies are single lines of json. A request has the
+    absolute interface filename, the working directory of the client and
+    the command line options. The reply has the exit code and, if
+    something went wrong, the traceback.
+"""
+import os
+import sys
+import errno
+import signal
+import socket
+import traceback
+from optparse import Values
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from .loader import FileCache
+from .scripts import compile_script
+
+def _send(f, message):
+    f.write(json.dumps(message) + '\n')
+    f.flush()
+
+def _reply(f, message):
+    """
+        `_send` *message*, unless the client is gone already.
+    """
+    try:
+        _send(f, message)
+    except (socket.error, IOError):
+        pass
+
+def _close(f, connection):
+    try:
+        f.close()
+        connection.close()
+    except (socket.error, IOError):
+        pass
+
+def _terminate(signum, frame):
+    raise SystemExit(0)
+
+def _reap_children():
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except OSError, e:
+            if e.errno == errno.ECHILD:
+                return
+            raise
+        if pid == 0:
+            return
+
+def _handle(files, request, interface, f):
+    """
+        Handle the *request* for the loaded *interface* in a forked child
+        and send the reply to *f*.
+    """
+    from . import generate, Stats, NullStats
+    try:
+        options = Values(request['options'])
+        stats = Stats() if options.stats is not None else NullStats()
+        filenames = [os.path.abspath(filename) for filename in interface.get('Files', ())]
+        objects, typedefs = files.load(filenames)
+        status = generate(interface, objects, typedefs, options, stats)
+    except Exception:
+        _reply(f, {'status': 1, 'error': traceback.format_exc()})
+    else:
+        _reply(f, {'status': status})
+
+def serve(address, json_cache=True):
+    """
+        Serve requests on the unix socket *address* forever.
+    """
+    from . import load_interface
+    files = FileCache(json_cache)
+    if os.path.exists(address):
+        os.remove(address)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(address)
+    server.listen(16)
+    print >>sys.stderr, 'babbisch-ooc: listening on %s' % address
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        while True:
+            connection, _ = server.accept()
+            _reap_children()
+            f = connection.makefile('r+b')
+            try:
+                request = json.loads(f.readline())
+                # load the objects here, so that they stay loaded.
+                os.chdir(request['cwd'])
+                with open(request['interface'], 'r') as interface_file:
+                    interface = load_interface(interface_file)
+                files.refresh([os.path.abspath(filename)
+                               for filename in interface.get('Files', ())])
+                # compiled scripts are kept here as well.
+                for filename in interface.get('Scripts', ()):
+                    compile_script(filename)
+            except Exception:
+                _reply(f, {'status': 1, 'error': traceback.format_exc()})
+                _close(f, connection)
+                continue
+            pid = os.fork()
+            if pid == 0:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                server.close()
+                try:
+                    _handle(files, request, interface, f)
+                    _close(f, connection)
+                finally:
+                    os._exit(0)
+            _close(f, connection)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.remove(address)
+    return 0
+
+def connect(address, interface_filename, options):
+    """
+        Let the daemon on the unix socket *address* generate the bindings
+        for *interface_filename* with the command line *options*. Return
+        the exit code.
+    """
+    request = {
+        'interface': os.path.abspath(interface_filename),
+        'cwd': os.getcwd(),
+        'options': dict(vars(options), serve=None, connect=None),
+    }
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(address)
+    try:
+        f = client.makefile('r+b')
+        _send(f, request)
+        line = f.readline()
+    finally:
+        client.close()
+    if not line:
+        print >>sys.stderr, 'babbisch-ooc: the server closed the connection'
+        return 1
+    reply = json.loads(line)
+    if 'error' in reply:
+        sys.stderr.write(reply['error'])
+    return reply['status']
@@ -0,0 +1,56 @@
+"""
+    Filtering strings (tags, header filenames) by lists of regexes.
+"""
+import re
+
+class PatternFilter(object):
+    """
+        Tells whether a string is matched (think `re.match`) by any of a
+        list of regexes. Each regex is compiled on its own, so inline
+        flags like ``(?i)`` only apply to their own pattern.
+
+        If *memoize* is true, the verdict is remembered for each string.
+        That pays off for header filenames, which are asked for over and
+        over again, but not for tags, which are asked for once each.
+    """
+    def __init__(self, patterns=(), memoize=False):
+        #: list of regex pattern strings.
+        self.patterns = []
+        self._regexes = []
+        self._verdicts = {} if memoize else None
+        self.hits = self.misses = 0
+        self.extend(patterns)
+
+    def extend(self, patterns):
+        """
+            Add *patterns*, which may be strings or compiled regexes.
+        """
+        for pattern in patterns:
+            self.patterns.append(getattr(pattern, 'pattern', pattern))
+            self._regexes.append(re.compile(pattern))
+        if self._verdicts is not None:
+            self._verdicts.clear()
+
+    def __nonzero__(self):
+        return bool(self.patterns)
+
+    def match(self, string):
+        """
+            Return True if any of the regexes matches *string*.
+        """
+        for regex in self._regexes:
+            if regex.match(string) is not None:
+                return True
+        return False
+
+    def __call__(self, string):
+        if self._verdicts is None:
+            return self.match(string)
+        try:
+            verdict = self._verdicts[string]
+        except KeyError:
+            self.misses += 1
+            verdict = self._verdicts[string] = self.match(string)
+            return verdict
+        self.hits += 1
+        return verdict
@@ -0,0 +1,75 @@
+"""
+    Interning: The same strings (tags like ``POINTER(CONST(char))``,
+    argument names, header filenames) appear in lots of objects, and
+    overlapping json files contain them over and over again. An
+    :class:`Interner` makes sure each distinct string is stored only
+    once while loading, which saves a lot of memory for big (or many)
+    files.
+
+    Only immutable values are shared. Every object keeps its own
+    argument and member lists and its own coord dictionary, so scripts
+    can still modify them without affecting other objects.
+"""
+
+#: Keys of babbisch objects whose values are strings.
+STRING_KEYS = ('tag', 'name', 'rettype', 'target')
+#: Keys of babbisch objects whose values are lists of lists or strings.
+SEQUENCE_KEYS = ('arguments', 'members', 'storage')
+
+class Interner(object):
+    """
+        Keeps the canonical copy of every string it has seen.
+    """
+    def __init__(self):
+        self._values = {}
+
+    def value(self, value):
+        """
+            Return the canonical copy of the hashable *value*.
+        """
+        return self._values.setdefault(value, value)
+
+    def sequence(self, items):
+        """
+            Intern the strings in the list of lists (or strings) *items*
+            (e.g. arguments or members) in place and return it.
+        """
+        values = self._values
+        for i, item in enumerate(items):
+            if isinstance(item, list):
+                for j, x in enumerate(item):
+                    if isinstance(x, basestring):
+                        item[j] = values.setdefault(x, x)
+            elif isinstance(item, basestring):
+                items[i] = values.setdefault(item, item)
+        return items
+
+    def coord(self, coord):
+        """
+            Intern the filename of the coord dictionary *coord* in place
+            and return it.
+        """
+        if 'file' in coord:
+            coord['file'] = self.value(coord['file'])
+        return coord
+
+    def object(self, obj):
+        """
+            Intern the values of the babbisch object dictionary *obj* in
+            place and return it.
+        """
+        values = self._values
+        for key in STRING_KEYS:
+            if key in obj:
+                value = obj[key]
+                obj[key] = values.setdefault(value, value)
+        coord = obj.get('coord')
+        if coord is not None:
+            self.coord(coord)
+        for key in SEQUENCE_KEYS:
+            if key in obj:
+                self.sequence(obj[key])
+        return obj
+
+    def __len__(self):
+        return len(self._values)
@@ -0,0 +1,230 @@
+"""
+    Binary caches of babbisch json files: Decoding big json files takes
+    a while, so the decoded (tag, object) pairs are also written to a
+    cache file in the cache directory (see :mod:`babbisch_ooc.cachedir`)
+    in the `marshal` format, which loads a lot faster. The cache is used
+    as long as the json file has the same size and modification time,
+    or, if only the modification time changed, the same sha1 hash.
+
+    A cache file consists of the header ``(MAGIC, CACHE_VERSION, size,
+    mtime, sha1)`` and one ``(tag, object)`` tuple per pair, followed by
+    None, each of them marshalled on its own, so it can be streamed.
+    After that comes the index, a list of ``(tag, class, header filename,
+    offset, typedef target)`` tuples, one per pair, and finally the offset
+    of the index as 8 byte little-endian integer. With the index, single
+    objects can be decoded on demand (see :class:`CacheSource`).
+"""
+import os
+import struct
+import marshal
+
+from . import cachedir
+
+#: Identifies babbisch json cache files.
+MAGIC = 'babbisch-ooc json cache'
+#: Bump this whenever the format changes.
+CACHE_VERSION = 2
+#: Extension of the cache files.
+CACHE_SUFFIX = '.bcache'
+
+def cache_filename(filename):
+    """
+        Return the cache filename of the json file *filename*.
+    """
+    return cachedir.cache_filename(filename, CACHE_SUFFIX)
+
+def file_hash(filename):
+    """
+        Return the sha1 hex digest of the contents of *filename*.
+    """
+    import hashlib
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), ''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_header(f):
+    """
+        Read the header of the cache file *f* and return it as a
+        (size, mtime, sha1) tuple, or None if it's no valid cache file.
+    """
+    try:
+        header = marshal.load(f)
+    except (EOFError, ValueError, TypeError):
+        return None
+    if (not isinstance(header, tuple) or len(header) != 5
+        or header[:2] != (MAGIC, CACHE_VERSION)):
+        return None
+    return header[2:]
+
+def _update_mtime(f, mtime):
+    """
+        Replace the mtime in the header of the opened cache file *f*,
+        which is positioned after the header.
+    """
+    end = f.tell()
+    f.seek(0)
+    size, old_mtime, sha1 = read_header(f)
+    header = marshal.dumps((MAGIC, CACHE_VERSION, size, mtime, sha1))
+    # the header has a fixed size, but better be sure.
+    if len(header) == end:
+        try:
+            with open(f.name, 'r+b') as out:
+                out.write(header)
+        except IOError:
+            pass
+    f.seek(end)
+
+def open_cache(filename):
+    """
+        Open the cache of the json file *filename* and return the file
+        object positioned after the header if the cache is fresh.
+        Otherwise, return None.
+    """
+    try:
+        f = open(cache_filename(filename), 'rb')
+    except IOError:
+        return None
+    try:
+        header = read_header(f)
+        if header is not None:
+            stat = os.stat(filename)
+            size, mtime, sha1 = header
+            if size == stat.st_size:
+                if mtime == stat.st_mtime:
+                    return f
+                elif sha1 == file_hash(filename):
+                    # only touched, remember the new mtime.
+                    _update_mtime(f, stat.st_mtime)
+                    return f
+    except (IOError, OSError):
+        pass
+    f.close()
+    return None
+
+def iter_cache(f):
+    """
+        Yield the (tag, object) pairs of the opened cache file *f* (see
+        `open_cache`) and close it.
+    """
+    with f:
+        load = marshal.load
+        while True:
+            try:
+                pair = load(f)
+            except EOFError:
+                raise ValueError('Truncated babbisch json cache: %s' % f.name)
+            if pair is None:
+                return
+            yield pair
+
+_TRAILER = struct.Struct('<Q')
+
+class CacheSource(object):
+    """
+        A fresh cache file (see `open_index`), which decodes single pairs
+        on demand.
+    """
+    def __init__(self, f):
+        self.filename = f.name
+        self.f = f
+        self.pid = os.getpid()
+        f.seek(-_TRAILER.size, os.SEEK_END)
+        offset, = _TRAILER.unpack(f.read(_TRAILER.size))
+        f.seek(offset)
+        #: list of (tag, class, header filename, offset, typedef target) tuples.
+        self.index = marshal.load(f)
+
+    def load(self, offset):
+        """
+            Decode the (tag, object) pair at *offset*.
+        """
+        if self.pid != os.getpid():
+            # forked; don't share the file position with the parent.
+            self.f = open(self.filename, 'rb')
+            self.pid = os.getpid()
+        self.f.seek(offset)
+        return marshal.load(self.f)
+
+def open_index(filename):
+    """
+        Return a :class:`CacheSource` for the json file *filename* if
+        its cache is fresh, None otherwise.
+    """
+    f = open_cache(filename)
+    if f is None:
+        return None
+    try:
+        return CacheSource(f)
+    except (IOError, EOFError, ValueError, TypeError, struct.error):
+        f.close()
+        return None
+
+class CacheWriter(object):
+    """
+        Writes the cache of the json file *filename* pair by pair to a
+        temporary file, which replaces the cache in `commit`. If the
+        cache can't be written, that's silently ignored.
+    """
+    def __init__(self, filename):
+        self.filename = cache_filename(filename)
+        self.tmp_filename = '%s.%d.tmp' % (self.filename, os.getpid())
+        self.f = None
+        if not cachedir.ensure_directory():
+            self.index = []
+            return
+        try:
+            stat = os.stat(filename)
+            header = (MAGIC, CACHE_VERSION, stat.st_size, stat.st_mtime, file_hash(filename))
+            self.f = open(self.tmp_filename, 'wb')
+            marshal.dump(header, self.f)
+        except (IOError, OSError):
+            self.f = None
+        self.index = []
+
+    def write(self, tag, obj):
+        """
+            Add a pair.
+        """
+        if self.f is not None:
+            try:
+                coord = obj.get('coord')
+                self.index.append((
+                    tag,
+                    obj.get('class'),
+                    coord['file'] if coord else None,
+                    self.f.tell(),
+                    obj.get('target') if obj.get('class') == 'Typedef' else None,
+                ))
+                marshal.dump((tag, obj), self.f)
+            except (IOError, ValueError):
+                self.abort()
+
+    def commit(self):
+        """
+            Finish the cache file and move it into place.
+        """
+        if self.f is not None:
+            try:
+                marshal.dump(None, self.f)
+                offset = self.f.tell()
+                marshal.dump(self.index, self.f)
+                self.f.write(_TRAILER.pack(offset))
+                self.f.close()
+                os.rename(self.tmp_filename, self.filename)
+            except (IOError, OSError):
+                self.abort()
+            self.f = None
+
+    def abort(self):
+        """
+            Throw the cache file away.
+        """
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+            try:
+                os.remove(self.tmp_filename)
+            except OSError:
+                pass
@@ -0,0 +1,220 @@
+"""
+    Loading babbisch objects from the json files listed in the `Files`
+    section of an interface.
+"""
+import os
+import re
+
+from .objects import make_object
+from .store import ObjectStore
+from .tags import TypedefIndex
+from .interning import Interner
+from . import jsoncache
+
+#: Number of bytes :func:`iter_pairs` reads at once.
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def iter_pairs(f, chunk_size=CHUNK_SIZE):
+    """
+        Incrementally decode the babbisch json document (a list of
+        ``[tag, object]`` pairs) in the file object *f* and yield the
+        (tag, object) pairs one by one. Only the pair that is being
+        decoded and a chunk of the document are kept in memory.
+    """
+    try:
+        import simplejson as json
+    except ImportError:
+        import json
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    read_size = chunk_size
+    # What comes next: 'start' (the opening bracket), 'first' (a pair or
+    # the closing bracket), 'pair' (a pair), 'next' (a comma or the
+    # closing bracket).
+    expect = 'start'
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos == len(buf):
+            if eof:
+                raise ValueError('Unexpected end of babbisch json document')
+            chunk = f.read(read_size)
+            buf = chunk
+            pos = 0
+            eof = not chunk
+            continue
+        char = buf[pos]
+        if expect == 'start':
+            if char != '[':
+                raise ValueError('Expected a list of babbisch objects, got %r' % char)
+            pos += 1
+            expect = 'first'
+        elif char == ']' and expect in ('first', 'next'):
+            return
+        elif expect == 'next':
+            if char != ',':
+                raise ValueError('Expected "," between babbisch objects, got %r' % char)
+            pos += 1
+            expect = 'pair'
+        else:
+            try:
+                pair, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # Most likely, the pair is incomplete. Read more. Reading
+                # twice as much each time keeps huge pairs from being
+                # decoded over and over again.
+                if eof:
+                    raise
+                chunk = f.read(read_size)
+                read_size *= 2
+                buf = buf[pos:] + chunk
+                pos = 0
+                eof = not chunk
+                continue
+            tag, obj = pair
+            yield tag, obj
+            pos = end
+            read_size = chunk_size
+            expect = 'next'
+
+def iter_file(filename, cache=True):
+    """
+        Yield the (tag, object) pairs of the babbisch json file *filename*.
+        If *cache* is true, they are read from its binary cache if that
+        is fresh, and the cache is (re)written otherwise (see
+        :mod:`babbisch_ooc.jsoncache`).
+    """
+    if cache:
+        f = jsoncache.open_cache(filename)
+        if f is not None:
+            return jsoncache.iter_cache(f)
+    return _iter_json(filename, cache)
+
+def _iter_json(filename, cache):
+    writer = jsoncache.CacheWriter(filename) if cache else None
+    complete = False
+    try:
+        with open(filename, 'r') as f:
+            for tag, obj in iter_pairs(f):
+                if writer is not None:
+                    writer.write(tag, obj)
+                yield tag, obj
+        complete = True
+    finally:
+        if writer is not None:
+            if complete:
+                writer.commit()
+            else:
+                writer.abort()
+
+def load_file(filename, cache=True):
+    """
+        Decode the babbisch json file *filename* and return its list of
+        (tag, object) pairs. See `iter_file` for *cache*.
+    """
+    return list(iter_file(filename, cache))
+
+def _load_file(args):
+    return load_file(*args)
+
+def load_files(filenames, jobs=1, typedefs=None, cache=True):
+    """
+        Load all babbisch objects from the json files *filenames* into
+        one :class:`ObjectStore` of records (see :mod:`babbisch_ooc.objects`).
+        If an object is defined in multiple files, the definition from the
+        last file wins.
+
+        If *jobs* is greater than 1, the files are decoded concurrently
+        in a pool of up to *jobs* worker processes. They are still merged
+        in the order of *filenames*, so the result is the same. Otherwise,
+        the objects are streamed into the store one by one.
+
+        If *typedefs* is a :class:`babbisch_ooc.tags.TypedefIndex`, all
+        typedefs are added to it while loading.
+
+        If *cache* is true, binary caches of the json files are used and
+        updated (see `iter_file`). Objects of files with a fresh cache
+        are not decoded until they are accessed.
+
+        All strings are interned (see :mod:`babbisch_ooc.interning`).
+    """
+    filenames = list(filenames)
+    interner = Interner()
+    intern = interner.value
+    objects = ObjectStore(interner=interner)
+    sources = [jsoncache.open_index(filename) if cache else None
+               for filename in filenames]
+    stale = [filename for filename, source in zip(filenames, sources)
+             if source is None]
+    jobs = min(jobs, len(stale))
+    pool = None
+    if jobs > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs)
+        # `imap` yields in order, so merging can start while the
+        # following files are still being decoded.
+        decoded = pool.imap(_load_file, [(filename, cache) for filename in stale])
+    else:
+        decoded = (iter_file(filename, cache) for filename in stale)
+    try:
+        for source in sources:
+            if source is not None:
+                for tag, class_name, filename, offset, target in source.index:
+                    tag = intern(tag)
+                    if filename is not None:
+                        filename = intern(filename)
+                    objects.add_lazy(tag, source, offset, class_name, filename)
+                    if typedefs is not None and class_name == 'Typedef':
+                        typedefs.add_typedef(tag, intern(target))
+            else:
+                for tag, obj in decoded.next():
+                    obj = objects[intern(tag)] = make_object(interner.object(obj))
+                    if typedefs is not None:
+                        typedefs.add(obj)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return objects
+
+class FileCache(object):
+    """
+        The decoded objects of babbisch json files, reloaded when they change.
+    """
+    def __init__(self, json_cache=True):
+        self.json_cache = json_cache
+        #: :class:`Interner` shared by all files, so overlapping files share their strings.
+        self.interner = Interner()
+        #: dictionary mapping absolute filenames to ((mtime, size), list of (tag, record)) tuples.
+        self.files = {}
+
+    def refresh(self, filenames):
+        """
+            Load all files in *filenames* that are new or changed.
+        """
+        for filename in filenames:
+            stat = os.stat(filename)
+            version = (stat.st_mtime, stat.st_size)
+            cached = self.files.get(filename)
+            if cached is None or cached[0] != version:
+                intern = self.interner.value
+                pairs = [(intern(tag), make_object(self.interner.object(obj)))
+                         for tag, obj in iter_file(filename, self.json_cache)]
+                self.files[filename] = (version, pairs)
+
+    def load(self, filenames):
+        """
+            Return an :class:`ObjectStore` and a :class:`TypedefIndex` of
+            the objects in *filenames* (which have to be refreshed), like
+            `load_files` does.
+        """
+        objects = ObjectStore()
+        typedefs = TypedefIndex()
+        for filename in filenames:
+            for tag, obj in self.files[filename][1]:
+                objects[tag] = obj
+                typedefs.add(obj)
+        return objects, typedefs
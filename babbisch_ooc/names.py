@@ -1,5 +1,33 @@
 import re
 
+#: Maximum number of results `oocize_name` and `oocize_type` remember.
+CACHE_SIZE = 1 << 16
+
+def memoize(func):
+    """
+        Remember the results of the one-argument function *func*. If more
+        than `CACHE_SIZE` results are cached, the cache starts over.
+    """
+    cache = {}
+    def memoized(name):
+        try:
+            result = cache[name]
+        except KeyError:
+            memoized.misses += 1
+            if len(cache) >= CACHE_SIZE:
+                cache.clear()
+            result = cache[name] = func(name)
+            return result
+        memoized.hits += 1
+        return result
+    memoized.cache = cache
+    memoized.hits = memoized.misses = 0
+    memoized.__name__ = func.__name__
+    memoized.__doc__ = func.__doc__
+    return memoized
+
+_LEADING_UPPERCASE = re.compile('[A-Z]+')
+
 def upper_first(name):
     if not name:
         return name
@@ -8,21 +36,52 @@ def upper_first(name):
     else:
         return name
 
+def _lower_first(name):
+    """
+        Lowercase the leading uppercase letters of *name*.
+    """
+    match = _LEADING_UPPERCASE.match(name)
+    if match is not None:
+        name = match.group().lower() + name[match.end():]
+    return name
+
+def _camelcase(name):
+    """
+        set_this -> setThis. The first part is kept as it is, all following
+        parts are oocized words with an uppercase first letter.
+    """
+    parts = name.split('_')
+    for idx in xrange(1, len(parts)):
+        part = parts[idx]
+        if not part:
+            # what `oocize_name` returns for the empty string.
+            parts[idx] = '_'
+        else:
+            # `oocize_name` for a single word: it doesn't contain any
+            # underscores, so there is nothing left to camelcase.
+            part = _lower_first(part)
+            if part[0].isdigit():
+                part = '_' + part
+            parts[idx] = upper_first(censor(part))
+    return ''.join(parts)
+
+@memoize
 def oocize_name(name):
     if not name:
         return '_' # TODO: that should not be necessary
     # lower first letters
-    name = re.sub('^([A-Z]+)', lambda m: m.group(1).lower(), name)
+    name = _lower_first(name)
     # set_this -> setThis
     # underscores at the start are kept.
     underscored = False
     if name.startswith('_') or name[0].isdigit():
         underscored = True
-    name = re.sub('_([^_]*)', lambda m: upper_first(oocize_name(m.group(1))), name)
+    name = _camelcase(name)
     if underscored:
         name = '_' + name
     return censor(name)
 
+@memoize
 def oocize_type(name):
     if not name:
         return '_' # TODO: that should not be necessary  
@@ -31,7 +90,7 @@ def oocize_type(name):
     underscored = False
     if name.startswith('_') or name[0].isdigit():
         underscored = True
-    name = re.sub('_([^_]*)', lambda m: upper_first(oocize_name(m.group(1))), name)
+    name = _camelcase(name)
     if underscored:
         name = '_' + name
     return censor(upper_first(name))
@@ -73,11 +132,12 @@ KEYWORDS = 'class, cover, interface, implement, func, abstract, extends, from, t
                 "_Bool",
                 "restrict", "Func", "NULL", "TRUE", "FALSE", "bool", 'String']
 
+_KEYWORD_SET = frozenset(KEYWORDS)
+
 def censor(name):
-    if name in KEYWORDS:
-        return censor(name + '_')
-    else:
-        return name
+    while name in _KEYWORD_SET:
+        name += '_'
+    return name
 
 def get_common_prefix(names):
     prefix = ''
@@ -0,0 +1,184 @@
+"""
+    Compact records for babbisch objects.
+
+    They behave like the dictionaries babbisch creates (``obj['name']``,
+    ``'coord' in obj``, ``obj.get('opaque', False)``, ...), but keep the
+    usual keys in slots. Any other key ends up in a dictionary that is
+    only created when it's needed.
+"""
+
+class BabbischObject(object):
+    __slots__ = ('tag', 'coord', 'ooc_name', 'c_name', 'wrapper', 'wrapped', '_extra')
+    #: The value of the ``'class'`` key.
+    class_name = None
+    #: frozenset of the keys stored in slots (filled in by `_init_fields`).
+    fields = frozenset()
+    _slot_keys = ()
+
+    def __init__(self, *args, **kwargs):
+        self._extra = None
+        self.update(*args, **kwargs)
+
+    def __getitem__(self, key):
+        if key == 'class':
+            return self.class_name
+        elif key in self.fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        elif self._extra is not None:
+            return self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'class':
+            if value != self.class_name:
+                raise ValueError("Can't turn a %s into a %s" % (self.class_name, value))
+        elif key in self.fields:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.fields:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        elif self._extra is not None:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key == 'class':
+            return True
+        elif key in self.fields:
+            return hasattr(self, key)
+        else:
+            return self._extra is not None and key in self._extra
+
+    has_key = __contains__
+
+    def __iter__(self):
+        yield 'class'
+        for key in self._slot_keys:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            for key in self._extra:
+                yield key
+
+    iterkeys = __iter__
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def __repr__(self):
+        return '<%s %r>' % (self.class_name, self.get('tag'))
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self._extra = None
+        self.update(state)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            self[key] = default
+            return default
+
+    def update(self, *args, **kwargs):
+        for other in args + (kwargs,):
+            if hasattr(other, 'iteritems'):
+                other = other.iteritems()
+            for key, value in other:
+                self[key] = value
+
+    def keys(self):
+        return list(self)
+
+    def itervalues(self):
+        for key in self:
+            yield self[key]
+
+    def values(self):
+        return list(self.itervalues())
+
+    def iteritems(self):
+        for key in self:
+            yield key, self[key]
+
+    def items(self):
+        return list(self.iteritems())
+
+    def to_dict(self):
+        """
+            Return a plain dictionary containing all keys.
+        """
+        return dict(self.iteritems())
+
+    copy = to_dict
+
+class Struct(BabbischObject):
+    __slots__ = ('name', 'members', 'opaque')
+    class_name = 'Struct'
+
+class Union(BabbischObject):
+    __slots__ = ('name', 'members', 'opaque')
+    class_name = 'Union'
+
+class Enum(BabbischObject):
+    __slots__ = ('name', 'members')
+    class_name = 'Enum'
+
+class Typedef(BabbischObject):
+    __slots__ = ('target',)
+    class_name = 'Typedef'
+
+class Function(BabbischObject):
+    __slots__ = ('name', 'arguments', 'rettype', 'varargs', 'storage')
+    class_name = 'Function'
+
+class Primitive(BabbischObject):
+    __slots__ = ('name',)
+    class_name = 'Primitive'
+
+#: Dictionary mapping babbisch class names to record classes.
+CLASSES = {}
+
+def _init_fields(cls):
+    slots = []
+    for base in reversed(cls.__mro__):
+        slots.extend(s for s in base.__dict__.get('__slots__', ()) if s != '_extra')
+    cls._slot_keys = tuple(slots)
+    cls.fields = frozenset(slots)
+    CLASSES[cls.class_name] = cls
+
+for _cls in (Struct, Union, Enum, Typedef, Function, Primitive):
+    _init_fields(_cls)
+del _cls
+
+def make_object(data):
+    """
+        Return a record for the babbisch object dictionary *data*. Objects
+        of unknown classes are returned as they are.
+    """
+    try:
+        cls = CLASSES[data['class']]
+    except KeyError:
+        return data
+    return cls(data)
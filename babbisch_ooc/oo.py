@@ -1,75 +1,206 @@
 import re
+from collections import defaultdict
+from operator import itemgetter
+
 from babbisch.odict import odict
 from .names import oocize_name
 from .wraplib.ooc import INDENT, DEDENT, Function, Class, Method
 
-import yaml
+class NameMatcher(object):
+    """
+        Matches functions whose name matches *regex*. The first group
+        is the method name.
+    """
+    def __init__(self, regex, this_idx=0):
+        self.regex = re.compile(regex)
+        self.this_idx = this_idx
+
+    def __call__(self, client, obj):
+        match = self.regex.match(obj['name'])
+        if match is not None:
+            return (match.group(1), self.this_idx)
+        else:
+            return False
+
+    def __repr__(self):
+        return '<NameMatcher %r this_idx=%d>' % (self.regex.pattern, self.this_idx)
+
+class TagMatcher(object):
+    """
+        Matches functions whose argument *this_idx* has the tag *tag*.
+        The first group of *name_regex* is the method name.
+    """
+    def __init__(self, tag, this_idx=0, name_regex='.*'):
+        self.tag = tag
+        self.this_idx = this_idx
+        self.name_regex = re.compile(name_regex)
+
+    def __call__(self, client, obj):
+        if len(obj['arguments']) <= self.this_idx:
+            return False
+        elif obj['arguments'][self.this_idx][1] == self.tag:
+            return (self.name_regex.match(obj['name']).group(1), self.this_idx)
+        else:
+            return False
+
+    def __repr__(self):
+        return '<TagMatcher %r this_idx=%d name_regex=%r>' % (
+                self.tag, self.this_idx, self.name_regex.pattern)
 
 def _match_by_name(loader, node):
     """
         This can be followed by a mapping or a string (as a short-hand).
     """
-    if isinstance(node, yaml.nodes.MappingNode):
+    if node.id == 'mapping':
         options = loader.construct_mapping(node)
-        regex = re.compile(options['regex'])
-        this_idx = int(options.get('this_idx', 0))
+        return NameMatcher(options['regex'], int(options.get('this_idx', 0)))
     else:
-        regex = re.compile(loader.construct_scalar(node))
-        this_idx = 0
-    def matches(client, obj):
-        match = regex.match(obj['name'])
-        if match is not None:
-            return (match.group(1), this_idx)
-        else:
-            return False
-    return matches
+        return NameMatcher(loader.construct_scalar(node))
 
 def _match_by_tag(loader, node):
     """
         Mapping or string, baby.
     """
-    if isinstance(node, yaml.nodes.MappingNode):
+    if node.id == 'mapping':
         options = loader.construct_mapping(node)
-        tag = options['tag']
-        this_idx = int(options.get('this_idx', 0))
-        name_regex = re.compile(options['name_regex'])
+        return TagMatcher(options['tag'], int(options.get('this_idx', 0)), options['name_regex'])
     else:
-        tag = loader.construct_scalar(node)
-        this_idx = 0
-        name_regex = re.compile('.*')
-    def matches(client, obj):
-        if len(obj['arguments']) <= this_idx:
-            return False
-        elif obj['arguments'][this_idx][1] == tag:
-            return (name_regex.match(obj['name']).group(1), this_idx)
+        return TagMatcher(loader.construct_scalar(node))
+
+def register_constructors(loader):
+    """
+        Teach the YAML loader class *loader* the ``!by_name`` and
+        ``!by_tag`` tags (see :func:`babbisch_ooc.load_interface`).
+    """
+    loader.add_constructor(u'!by_name', _match_by_name)
+    loader.add_constructor(u'!by_tag', _match_by_tag)
+
+_REGEX_SPECIAL = frozenset('.^$*+?{}[]\\|()')
+
+def _literal_prefix(pattern):
+    """
+        Return a string every string matched by the regex *pattern* starts
+        with. That's the empty string if we can't tell.
+    """
+    if '|' in pattern:
+        return ''
+    prefix = []
+    for char in pattern:
+        if char in _REGEX_SPECIAL:
+            # these might make the last character optional.
+            if char in '*?{' and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+    return ''.join(prefix)
+
+class MatcherIndex(object):
+    """
+        Collection of matchers, each with a priority and a value, that
+        finds the matchers matching a function without trying all of
+        them: `TagMatcher` instances are indexed by the tag they expect
+        at their `this_idx`, `NameMatcher` instances by the literal
+        prefix of their regex. Other matchers are always tried.
+    """
+    def __init__(self):
+        #: dictionary mapping (this_idx, tag) to lists of entries.
+        self.by_tag = defaultdict(list)
+        #: dictionary mapping regex prefixes to lists of entries.
+        self.by_prefix = defaultdict(list)
+        #: entries that have to be tried for every function.
+        self.always = []
+        self._this_idxs = set()
+        self._prefix_lengths = set()
+
+    def __len__(self):
+        return (len(self.always)
+                + sum(map(len, self.by_tag.itervalues()))
+                + sum(map(len, self.by_prefix.itervalues())))
+
+    def add(self, matcher, priority, value):
+        """
+            Add *matcher*. If multiple matchers match a function, the
+            one with the lowest *priority* wins. *value* is returned
+            along with its result.
+        """
+        entry = (priority, matcher, value)
+        if isinstance(matcher, TagMatcher):
+            self.by_tag[matcher.this_idx, matcher.tag].append(entry)
+            self._this_idxs.add(matcher.this_idx)
+        elif isinstance(matcher, NameMatcher):
+            prefix = _literal_prefix(matcher.regex.pattern)
+            if prefix:
+                self.by_prefix[prefix].append(entry)
+                self._prefix_lengths.add(len(prefix))
+            else:
+                self.always.append(entry)
         else:
-            return False
-    return matches
-
-yaml.add_constructor(u'!by_name', _match_by_name)
-yaml.add_constructor(u'!by_tag', _match_by_tag)
-
-def _apply_methods(client, object_name, object_info):
-    for obj in client.objects.itervalues():
-        if obj['class'] == 'Function':
-            wrapped = False
-            # Static methods!
-            for matcher in object_info.get('static_methods', ()):
-                result = matcher(client, obj)
-                if result:
-                    method_name, this_idx = result
-                    # Add the method. We're just implicitly occizing the name. Evil, isn't it?
+            self.always.append(entry)
+
+    def candidates(self, obj):
+        """
+            Return the entries that might match the function *obj*,
+            sorted by priority.
+        """
+        entries = list(self.always)
+        name = obj['name']
+        for length in self._prefix_lengths:
+            if len(name) >= length:
+                entries.extend(self.by_prefix.get(name[:length], ()))
+        arguments = obj['arguments']
+        for this_idx in self._this_idxs:
+            if this_idx < len(arguments):
+                entries.extend(self.by_tag.get((this_idx, arguments[this_idx][1]), ()))
+        entries.sort(key=itemgetter(0))
+        return entries
+
+    def first_match(self, client, obj):
+        """
+            Return (value, result) of the matcher with the lowest priority
+            that matches the function *obj*, or None.
+        """
+        for priority, matcher, value in self.candidates(obj):
+            result = matcher(client, obj)
+            if result:
+                return (value, result)
+        return None
+
+def _add_method_matchers(index, position, object_name, object_info):
+    """
+        Add the method matchers of the object *object_name*, which is at
+        *position* in the `Objects` section, to *index*.
+
+        A function belongs to the last object it matches. For that object,
+        the first matching static method matcher wins. If there is none,
+        the last matching method matcher wins.
+    """
+    for idx, matcher in enumerate(object_info.get('static_methods', ())):
+        index.add(matcher, (-position, 0, idx), (object_name, True))
+    for idx, matcher in enumerate(object_info.get('methods', ())):
+        index.add(matcher, (-position, 1, -idx), (object_name, False))
+
+def _apply_functions(client, methods, errors):
+    """
+        Walk all functions once. Bind them to objects using the method
+        matchers in *methods* and mark them as checked if any matcher in
+        *errors* matches.
+    """
+    if not (len(methods) or len(errors)):
+        return
+    objects = client.objects
+    for tag in objects:
+        if objects.class_name(tag) == 'Function':
+            obj = objects[tag]
+            match = methods.first_match(client, obj)
+            if match is not None:
+                (object_name, static), (method_name, this_idx) = match
+                # Add the method. We're just implicitly occizing the name. Evil, isn't it?
+                if static:
                     client.add_method(obj['name'], oocize_name(method_name), object_name, static=True)
-                    wrapped = True
-                    break
-            # Methods!
-            if not wrapped:
-                for matcher in object_info.get('methods', ()):
-                    result = matcher(client, obj)
-                    if result:
-                        method_name, this_idx = result
-                        # Add the method. We're just implicitly occizing the name. Evil, isn't it?
-                        client.add_method(obj['name'], oocize_name(method_name), object_name, this_idx)
+                else:
+                    client.add_method(obj['name'], oocize_name(method_name), object_name, this_idx)
+            if errors.first_match(client, obj) is not None:
+                client.checked_functions.add(obj['name'])
 
 def _apply_properties(client, object_name, object_info):
     for name, prop_info in object_info.get('properties', {}).iteritems():
@@ -86,30 +217,35 @@ def apply_settings(client):
     """
         Apply all oo settings.
     """
+    methods = MatcherIndex()
     # Add artificial covers.
-    for object_name, info in client.interface.get('Objects', {}).iteritems():
+    for position, (object_name, info) in enumerate(client.interface.get('Objects', {}).iteritems()):
         client.add_artificial_cover(object_name, info['type'], info['tag'], info.get('extends', ''))
-        # Add methods.
-        _apply_methods(client, object_name, info)
+        # Collect methods.
+        _add_method_matchers(methods, position, object_name, info)
         # Properties.
         _apply_properties(client, object_name, info)
-    apply_errors(client)
+    errors = apply_errors(client)
+    # Add methods and checked functions, all at once.
+    _apply_functions(client, methods, errors)
 
 def apply_errors(client):
+    """
+        Add the error checking function and exception if there is an
+        `Errors` section and return a `MatcherIndex` of its function
+        matchers.
+    """
+    index = MatcherIndex()
     if 'Errors' in client.interface:
         # add check func / exeption
         cls = make_check_exception()
         client._codegens[cls.name] = cls
         func = make_check_func(client.interface['Errors'].get('names', []))
         client._codegens[func.name] = func
-        # mark checked functions
-        matchers = client.interface['Errors'].get('functions', [])
-        for obj in client.objects.itervalues():
-            if obj['class'] == 'Function':
-                for matcher in matchers:
-                    result = matcher(client, obj)
-                    if result:
-                        client.checked_functions.add(obj['name'])
+        # functions to be marked as checked
+        for idx, matcher in enumerate(client.interface['Errors'].get('functions', [])):
+            index.add(matcher, idx, None)
+    return index
 
 ERROR_CHECKING_FUNCTION = '_checkError'
 
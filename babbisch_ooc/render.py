@@ -0,0 +1,66 @@
+"""
+    Parallel rendering: The ordered list of codegens is split into
+    chunks, which a pool of forked processes renders to strings. They are
+    written in the original order, so the output is the same as if it
+    was rendered in one process. The workers inherit the client and the
+    codegens, so nothing but the rendered code has to be pickled.
+"""
+from .wraplib.codegen import Codegen
+
+#: Chunks have at least that many codegens, so that the cost of sending
+#: the code back doesn't outweigh the rendering.
+MIN_CHUNK_SIZE = 64
+#: Number of chunks per process, to balance the load.
+CHUNKS_PER_JOB = 8
+
+# The client and chunks the forked workers of `render_parallel` operate on.
+_client = None
+_chunks = None
+
+def _render_chunk(index):
+    """
+        Render the chunk at *index* of `_chunks`. Return the code and a
+        dictionary of the render cache entries stored meanwhile.
+    """
+    render_cache = _client.render_cache
+    if render_cache is not None:
+        known = set(render_cache.used)
+    codegen = Codegen()
+    _client.render(codegen, _chunks[index])
+    if render_cache is None:
+        return codegen.buf, {}
+    return codegen.buf, dict((key, value) for key, value in render_cache.used.iteritems()
+                             if key not in known)
+
+def split_chunks(wrappers, jobs):
+    """
+        Split the list *wrappers* into a list of chunks for *jobs* processes.
+    """
+    size = max(MIN_CHUNK_SIZE, len(wrappers) // (jobs * CHUNKS_PER_JOB) + 1)
+    return [wrappers[i:i + size] for i in xrange(0, len(wrappers), size)]
+
+def render_parallel(client, codegen, wrappers, jobs):
+    """
+        Render the list of codegens *wrappers* of *client* using up to
+        *jobs* processes and write the code to the :class:`Codegen`
+        *codegen*, just like ``client.render(codegen, wrappers)``.
+    """
+    global _client, _chunks
+    chunks = split_chunks(wrappers, jobs)
+    if jobs <= 1 or len(chunks) <= 1:
+        client.render(codegen, wrappers)
+        return
+    import multiprocessing
+    _client, _chunks = client, chunks
+    try:
+        pool = multiprocessing.Pool(min(jobs, len(chunks)))
+        try:
+            for code, entries in pool.imap(_render_chunk, xrange(len(chunks))):
+                codegen.write(code)
+                if client.render_cache is not None:
+                    client.render_cache.used.update(entries)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        _client = _chunks = None
@@ -0,0 +1,102 @@
+"""
+    Interface scripts: Every script listed in ``Scripts`` is executed
+    once per run. It may define a ``process(client)`` function that is
+    called with the whole :class:`babbisch_ooc.OOClient` after the
+    wrappers have been generated, and any of the hooks in `HOOKS`, which
+    are called while the objects are traversed, so scripts that only care
+    about single objects don't need to walk over all objects again::
+
+        def on_function(client, obj):
+            if obj['name'].startswith('gtk_'):
+                client.checked_functions.add(obj['name'])
+
+    ``on_function``, ``on_struct``, ``on_union``, ``on_enum`` and
+    ``on_typedef`` are called as ``hook(client, obj)`` after the wrapper
+    of a (not ignored) object of that class has been generated, and
+    ``on_wrapper_created`` as ``hook(client, obj, wrapper)`` whenever a
+    new top-level wrapper is added.
+
+    Compiling scripts takes a while, so their code objects are cached
+    in the cache directory (see :mod:`babbisch_ooc.cachedir`) in the
+    `marshal` format, as long as the script has the same size and
+    modification time, and in memory for daemon and batch runs.
+"""
+import os
+import imp
+import marshal
+
+from . import cachedir
+
+#: Identifies babbisch-ooc script caches.
+MAGIC = 'babbisch-ooc script cache'
+#: Extension of the cache files.
+CACHE_SUFFIX = '.bcode'
+
+#: Hooks a script can define.
+HOOKS = ('on_function', 'on_struct', 'on_union', 'on_enum', 'on_typedef',
+         'on_wrapper_created')
+
+#: Dictionary mapping babbisch object classes to their hook names.
+CLASS_HOOKS = {
+    'Function': 'on_function',
+    'Struct': 'on_struct',
+    'Union': 'on_union',
+    'Enum': 'on_enum',
+    'Typedef': 'on_typedef',
+}
+
+# Dictionary mapping (filename, size, mtime) to code objects.
+_compiled = {}
+
+def _read_cache(filename, key):
+    try:
+        with open(cachedir.cache_filename(filename, CACHE_SUFFIX), 'rb') as f:
+            header = marshal.load(f)
+            if header != (MAGIC, imp.get_magic()) + key:
+                return None
+            return marshal.load(f)
+    except (IOError, EOFError, ValueError, TypeError):
+        return None
+
+def _write_cache(filename, key, code):
+    if not cachedir.ensure_directory():
+        return
+    cache = cachedir.cache_filename(filename, CACHE_SUFFIX)
+    temp = '%s.%d.tmp' % (cache, os.getpid())
+    try:
+        with open(temp, 'wb') as f:
+            marshal.dump((MAGIC, imp.get_magic()) + key, f)
+            marshal.dump(code, f)
+        os.rename(temp, cache)
+    except (IOError, OSError):
+        # not writable? never mind.
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+
+def compile_script(filename):
+    """
+        Return the code object of the script *filename*, from the cache
+        if it's fresh.
+    """
+    st = os.stat(filename)
+    key = (st.st_size, st.st_mtime)
+    path = os.path.abspath(filename)
+    code = _compiled.get((path,) + key)
+    if code is None:
+        code = _read_cache(filename, key)
+        if code is None:
+            with open(filename, 'rU') as f:
+                code = compile(f.read() + '\n', filename, 'exec')
+            _write_cache(filename, key, code)
+        _compiled[(path,) + key] = code
+    return code
+
+def load_script(filename):
+    """
+        Execute the script *filename* and return its namespace.
+    """
+    namespace = {'__name__': '__babbisch_script__', '__file__': filename}
+    exec compile_script(filename) in namespace
+    return namespace
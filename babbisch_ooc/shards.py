@@ -0,0 +1,203 @@
+"""
+    Sharded output: Instead of one big ooc module, write one module per
+    C header (the ``coord.file`` of the wrapped objects) and an umbrella
+    module importing all of them. If the bindings are written to
+    ``gtk.ooc``, the shards end up in ``gtk/``, e.g. ``gtk/gtkwindow_ooc.ooc``
+    for ``gtkwindow.h``. Wrappers that don't belong to any header, like
+    opaque types and the error checking code, go to a common shard.
+
+    The shards are written by a pool of forked processes, which inherit
+    the client and the codegens, so nothing has to be pickled.
+"""
+import os
+import re
+
+from babbisch.odict import odict
+
+from .wraplib.codegen import Codegen
+from .tags import subtags, referenced_tags
+
+class Shard(object):
+    """
+        One output module.
+    """
+    def __init__(self, module, filename):
+        #: ooc module path of the shard, e.g. ``gtk/gtkwindow_ooc``.
+        self.module = module
+        #: Filename of the shard.
+        self.filename = filename
+        #: set of header filenames the shard has to include.
+        self.headers = set()
+        #: set of module paths the shard has to import.
+        self.imports = set()
+        #: list of codegens, in output order.
+        self.codegens = []
+
+    def generate_header_code(self, client):
+        """
+            Return the include and import lines of the shard.
+        """
+        code = client.generate_header_code(sorted(self.headers))
+        code[-1:] = ['import %s' % module for module in sorted(self.imports)]
+        code.append('')
+        return code
+
+def _module_name(header):
+    """
+        Return the shard module name for the header filename *header*.
+        The suffix makes sure it never clashes with the C header itself.
+    """
+    stem = os.path.splitext(os.path.basename(header))[0]
+    return re.sub('[^A-Za-z0-9_]', '_', stem) + '_ooc'
+
+def split_codegens(client, output):
+    """
+        Distribute the codegens of the (already run) *client* to shards,
+        given the filename of the umbrella module *output*. Return an odict
+        mapping module paths to :class:`Shard` objects, the common shard
+        first. Empty shards are left out.
+    """
+    directory = os.path.splitext(output)[0]
+    package = os.path.basename(directory)
+    shards = odict()
+    used_names = set()
+    def _make_shard(name):
+        unique = name
+        counter = 1
+        while unique in used_names:
+            counter += 1
+            unique = '%s%d' % (name, counter)
+        used_names.add(unique)
+        module = '%s/%s' % (package, unique)
+        shards[module] = shard = Shard(module, os.path.join(directory, unique + '.ooc'))
+        return shard
+    common = _make_shard(package + '_common')
+    by_header = {}
+    def _header_shard(header):
+        try:
+            return by_header[header]
+        except KeyError:
+            shard = by_header[header] = _make_shard(_module_name(header))
+            return shard
+
+    # Find the header of every wrapper.
+    headers = {}
+    for obj in client.objects.itervalues():
+        if 'wrapper' in obj and 'coord' in obj:
+            headers[id(obj['wrapper'])] = obj['coord']['file']
+    # Artificial covers go where the type they cover is declared.
+    for tag, name in client.artificial.iteritems():
+        wrapper = client.codegens.get(name)
+        if wrapper is None:
+            continue
+        for subtag in subtags(tag):
+            obj = client.objects.get(subtag)
+            if obj is not None and 'coord' in obj:
+                headers[id(wrapper)] = obj['coord']['file']
+                break
+
+    # Distribute the codegens.
+    owners = {}
+    for name, wrapper in client.codegens.iteritems():
+        if name.startswith('!'):
+            continue
+        header = headers.get(id(wrapper))
+        if header is None:
+            shard = common
+        else:
+            shard = _header_shard(header)
+            if not client.ignored_headers(header):
+                shard.headers.add(header)
+        shard.codegens.append(wrapper)
+        owners[id(wrapper)] = shard
+
+    # Find the imports: the shards of all types an object refers to
+    # are imported by the shard of the object, or of its class if it
+    # became a method.
+    def _owner(tag):
+        if tag in client.artificial:
+            wrapper = client.codegens.get(client.artificial[tag])
+        else:
+            obj = client.objects.get(tag)
+            if obj is None:
+                return None
+            wrapper = obj.get('wrapper')
+            if tag in client.methods:
+                wrapper = client.codegens.get(client.methods[tag].this_tag)
+        return owners.get(id(wrapper))
+    for tag, obj in client.objects.iteritems():
+        shard = _owner(tag)
+        if shard is None:
+            continue
+        for subtag in referenced_tags(obj):
+            dependency = _owner(subtag)
+            if dependency is not None and dependency is not shard:
+                shard.imports.add(dependency.module)
+    # Everyone might need the common wrappers (e.g. for error checking).
+    for shard in shards.itervalues():
+        if shard is not common and common.codegens:
+            shard.imports.add(common.module)
+
+    for module, shard in shards.items():
+        if not shard.codegens:
+            del shards[module]
+    return shards
+
+# The client and shards the forked workers of `write_shards` operate on.
+_client = None
+_shards = None
+
+def _write_shard(index):
+    """
+        Write the shard at *index* of `_shards`. Return a dictionary of
+        the render cache entries stored meanwhile.
+    """
+    shard = _shards[index]
+    render_cache = _client.render_cache
+    if render_cache is not None:
+        known = set(render_cache.used)
+    with open(shard.filename, 'w') as f:
+        codegen = Codegen(f)
+        codegen(shard.generate_header_code(_client))
+        _client.render(codegen, shard.codegens)
+    if render_cache is None:
+        return {}
+    return dict((key, value) for key, value in render_cache.used.iteritems()
+                if key not in known)
+
+def write_shards(client, output, jobs=1):
+    """
+        Write the code of the *client* (after running all stages, see
+        :meth:`OOClient.prepare`) as shards and an umbrella module to the
+        filename *output*, using up to *jobs* processes. Return the list
+        of shards.
+    """
+    global _client, _shards
+    shards = split_codegens(client, output).values()
+    directory = os.path.splitext(output)[0]
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    _client, _shards = client, shards
+    try:
+        indices = range(len(shards))
+        if jobs > 1 and len(shards) > 1:
+            import multiprocessing
+            pool = multiprocessing.Pool(min(jobs, len(shards)))
+            try:
+                results = pool.map(_write_shard, indices)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = map(_write_shard, indices)
+    finally:
+        _client = _shards = None
+    # the workers rendered the cache misses, remember them.
+    if client.render_cache is not None:
+        for entries in results:
+            client.render_cache.used.update(entries)
+    with open(output, 'w') as f:
+        codegen = Codegen(f)
+        for shard in shards:
+            codegen('import %s' % shard.module)
+    return shards
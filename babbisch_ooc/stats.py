@@ -0,0 +1,136 @@
+"""
+    Instrumentation: wall time and memory per phase, plus counters and
+    cache hit rates, collected if ``--stats`` is given.
+"""
+import time
+import resource
+from contextlib import contextmanager
+
+def _peak_memory():
+    """
+        Return the peak resident memory of this process in KiB.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _current_memory():
+    """
+        Return the resident memory of this process in KiB, or None if
+        the system doesn't tell.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (IOError, ValueError, IndexError):
+        return None
+    return pages * resource.getpagesize() // 1024
+
+class Stats(object):
+    """
+        Collects statistics of a run and writes them as a json report.
+    """
+    #: False if nothing is recorded, so callers can skip the work.
+    enabled = True
+
+    def __init__(self):
+        #: list of dictionaries describing the phases, in order.
+        self.phases = []
+        #: dictionary mapping counter names to numbers.
+        self.counters = {}
+        #: dictionary mapping cache names to (hits, misses) tuples.
+        self.caches = {}
+
+    @contextmanager
+    def phase(self, name):
+        """
+            Measure the phase *name* (use it in a ``with`` statement).
+            Recorded are the wall time and the growth of the peak and
+            the current resident memory (the latter is None where it's
+            unknown). Nothing is allocated for that, so it doesn't
+            distort the numbers.
+        """
+        memory_before = _current_memory()
+        peak_before = _peak_memory()
+        start = time.time()
+        try:
+            yield
+        finally:
+            seconds = time.time() - start
+            peak = _peak_memory()
+            memory = _current_memory()
+            if memory is None or memory_before is None:
+                memory_growth = None
+            else:
+                memory_growth = memory - memory_before
+            self.phases.append({
+                'name': name,
+                'seconds': seconds,
+                'peak_memory_kib': peak,
+                'peak_memory_growth_kib': peak - peak_before,
+                'memory_kib': memory,
+                'memory_growth_kib': memory_growth,
+            })
+
+    def count(self, name, value=1):
+        """
+            Add *value* to the counter *name*.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def cache(self, name, hits, misses):
+        """
+            Record the *hits* and *misses* of the cache *name*.
+        """
+        self.caches[name] = (hits, misses)
+
+    def report(self):
+        """
+            Return the report as a dictionary.
+        """
+        caches = {}
+        for name, (hits, misses) in self.caches.iteritems():
+            lookups = hits + misses
+            caches[name] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': float(hits) / lookups if lookups else None,
+            }
+        return {
+            'phases': self.phases,
+            'total_seconds': sum(phase['seconds'] for phase in self.phases),
+            'counters': self.counters,
+            'caches': caches,
+        }
+
+    def write(self, filename):
+        """
+            Write the report to the file *filename*.
+        """
+        try:
+            import simplejson as json
+        except ImportError:
+            import json
+        with open(filename, 'w') as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+
+class _NullPhase(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        return False
+
+class NullStats(Stats):
+    """
+        Stats that don't record anything. Used if no stats are wanted.
+    """
+    enabled = False
+    _null_phase = _NullPhase()
+
+    def phase(self, name):
+        return self._null_phase
+
+    def count(self, name, value=1):
+        pass
+
+    def cache(self, name, hits, misses):
+        pass
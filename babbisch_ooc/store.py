@@ -0,0 +1,169 @@
+"""
+    On-demand decoding of babbisch objects: An :class:`ObjectStore` is
+    an ordered mapping of tags to objects, like the odict babbisch
+    creates, but objects from fresh json caches (see
+    :mod:`babbisch_ooc.jsoncache`) are only decoded when they are first
+    accessed. Until then, just their position in the cache file, their
+    class and their header filename are kept, which is enough to decide
+    whether they are needed at all.
+"""
+from babbisch.odict import odict
+
+from .objects import make_object
+
+class LazyObject(object):
+    """
+        Placeholder for an object that has not been decoded yet.
+    """
+    __slots__ = ('source', 'offset', 'class_name', 'filename')
+
+    def __init__(self, source, offset, class_name, filename):
+        self.source = source
+        self.offset = offset
+        self.class_name = class_name
+        self.filename = filename
+
+    def load(self, interner=None):
+        """
+            Decode the object and return it as record, interning its
+            values with *interner* if given.
+        """
+        tag, obj = self.source.load(self.offset)
+        if interner is not None:
+            interner.object(obj)
+        return make_object(obj)
+
+class ObjectStore(object):
+    """
+        Ordered mapping of tags to babbisch objects, decoding them on
+        first access.
+    """
+    def __init__(self, objects=(), interner=None):
+        self._entries = odict()
+        #: :class:`babbisch_ooc.interning.Interner` for decoded objects, or None.
+        self.interner = interner
+        #: Number of objects decoded on demand so far.
+        self.decoded = 0
+        self.update(objects)
+
+    def add_lazy(self, tag, source, offset, class_name, filename):
+        """
+            Add the object *tag* stored at *offset* in the
+            :class:`jsoncache.CacheSource` *source*. *class_name* and
+            *filename* are its class and header filename.
+        """
+        self._entries[tag] = LazyObject(source, offset, class_name, filename)
+
+    def __getitem__(self, tag):
+        obj = self._entries[tag]
+        if type(obj) is LazyObject:
+            obj = self._entries[tag] = obj.load(self.interner)
+            self.decoded += 1
+        return obj
+
+    def __setitem__(self, tag, obj):
+        self._entries[tag] = obj
+
+    def __delitem__(self, tag):
+        del self._entries[tag]
+
+    def __contains__(self, tag):
+        return tag in self._entries
+
+    has_key = __contains__
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    iterkeys = __iter__
+
+    def keys(self):
+        return self._entries.keys()
+
+    def get(self, tag, default=None):
+        try:
+            return self[tag]
+        except KeyError:
+            return default
+
+    def setdefault(self, tag, default=None):
+        try:
+            return self[tag]
+        except KeyError:
+            self[tag] = default
+            return default
+
+    def pop(self, tag, *default):
+        try:
+            obj = self[tag]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[tag]
+        return obj
+
+    def update(self, *args, **kwargs):
+        for other in args + (kwargs,):
+            if hasattr(other, 'iteritems'):
+                other = other.iteritems()
+            for tag, obj in other:
+                self[tag] = obj
+
+    def iteritems(self):
+        for tag in self._entries.keys():
+            if tag in self._entries:
+                yield tag, self[tag]
+
+    def itervalues(self):
+        for tag, obj in self.iteritems():
+            yield obj
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def is_loaded(self, tag):
+        """
+            Return True if the object *tag* has been decoded already.
+        """
+        return type(self._entries[tag]) is not LazyObject
+
+    def class_name(self, tag):
+        """
+            Return the class of the object *tag* without decoding it.
+        """
+        obj = self._entries[tag]
+        if type(obj) is LazyObject:
+            return obj.class_name
+        return obj['class']
+
+    def filename(self, tag):
+        """
+            Return the header filename of the object *tag* (or None if it
+            has no coord) without decoding it.
+        """
+        obj = self._entries[tag]
+        if type(obj) is LazyObject:
+            return obj.filename
+        elif 'coord' in obj:
+            return obj['coord']['file']
+        return None
+
+    def discard(self, tags):
+        """
+            Remove all objects whose tags are in the iterable *tags*, in
+            one go.
+        """
+        tags = set(tags)
+        if tags:
+            entries = odict()
+            for tag, obj in self._entries.iteritems():
+                if tag not in tags:
+                    entries[tag] = obj
+            self._entries = entries
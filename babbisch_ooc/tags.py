@@ -0,0 +1,172 @@
+"""
+    Memoized access to parsed babbisch tags. The same tags (think of
+    ``POINTER(CONST(char))``) are looked at over and over again, so they
+    are parsed only once and the results are shared.
+"""
+from babbisch.tag import translate, parse_string
+from babbisch.odict import odict
+
+_parsed = {}
+_first_arguments = {}
+_compounds = {}
+_embedded = {}
+_subtags = {}
+
+def parse_tag(tag):
+    """
+        Return ``parse_string(tag)``. Don't modify the result, it's shared.
+    """
+    try:
+        return _parsed[tag]
+    except KeyError:
+        result = _parsed[tag] = parse_string(tag)
+        return result
+
+def first_argument(tag):
+    """
+        Return the tag of the first argument of the tag *tag*, e.g.
+        ``CONST(char)`` for ``POINTER(CONST(char))``.
+    """
+    try:
+        return _first_arguments[tag]
+    except KeyError:
+        result = _first_arguments[tag] = translate(parse_tag(tag)[1][0])
+        return result
+
+def find_compound(tag):
+    """
+        Follow *tag* and its first arguments (e.g. ``POINTER(CONST(STRUCT(x)))``
+        -> ``CONST(STRUCT(x))`` -> ``STRUCT(x)``) and return the first
+        STRUCT or UNION tag on the way, or None if there is none.
+    """
+    try:
+        return _compounds[tag]
+    except KeyError:
+        pass
+    if '(' not in tag:
+        result = None
+    elif parse_tag(tag)[0] in ('STRUCT', 'UNION'):
+        result = tag
+    else:
+        result = find_compound(first_argument(tag))
+    _compounds[tag] = result
+    return result
+
+def find_embedded_compound(tag):
+    """
+        Like `find_compound`, but return None if there is a POINTER on
+        the way, i.e. return the STRUCT or UNION tag *tag* contains by
+        value (e.g. ``STRUCT(x)`` for ``ARRAY(CONST(STRUCT(x)), 4)``).
+    """
+    try:
+        return _embedded[tag]
+    except KeyError:
+        pass
+    if '(' not in tag:
+        result = None
+    else:
+        mod = parse_tag(tag)[0]
+        if mod in ('STRUCT', 'UNION'):
+            result = tag
+        elif mod == 'POINTER':
+            result = None
+        else:
+            result = find_embedded_compound(first_argument(tag))
+    _embedded[tag] = result
+    return result
+
+def subtags(tag):
+    """
+        Return a tuple of *tag* and all tags nested in it, e.g.
+        ``('POINTER(CONST(char))', 'CONST(char)', 'char')``.
+    """
+    try:
+        return _subtags[tag]
+    except KeyError:
+        pass
+    result = [tag]
+    if '(' in tag:
+        for arg in parse_tag(tag)[1]:
+            result.extend(subtags(translate(arg)))
+    result = _subtags[tag] = tuple(result)
+    return result
+
+def object_types(obj):
+    """
+        Return a list of the argument, return, member and target types
+        of the babbisch object *obj*.
+    """
+    cls = obj['class']
+    if cls == 'Function':
+        types = [type for name, type in obj['arguments']]
+        types.append(obj['rettype'])
+    elif cls in ('Struct', 'Union'):
+        types = [member[1] for member in obj['members']]
+    elif cls == 'Typedef':
+        types = [obj['target']]
+    else:
+        types = []
+    return types
+
+def referenced_tags(obj):
+    """
+        Return a set of the tags the babbisch object *obj* refers to
+        (argument, return, member and target types), including all
+        nested tags.
+    """
+    tags = set()
+    for type in object_types(obj):
+        tags.update(subtags(type))
+    return tags
+
+class TypedefIndex(object):
+    """
+        Index of typedefs referring to structs or unions, used to find
+        opaque types without walking (or copying) all objects.
+    """
+    def __init__(self, objects=()):
+        #: odict mapping typedef tags to the STRUCT or UNION tags they refer to.
+        self.compounds = odict()
+        for obj in objects:
+            self.add(obj)
+
+    def add(self, obj):
+        """
+            Add the babbisch object *obj* if it is a typedef of interest.
+        """
+        if obj['class'] == 'Typedef':
+            self.add_typedef(obj['tag'], obj['target'])
+
+    def add_typedef(self, tag, target):
+        """
+            Add the typedef *tag* of *target* if it's of interest.
+        """
+        compound = find_compound(target)
+        if compound is not None:
+            self.compounds[tag] = compound
+        elif tag in self.compounds:
+            # a redefinition replaces the old entry.
+            del self.compounds[tag]
+
+    def iter_unknown(self, objects):
+        """
+            Yield the STRUCT and UNION tags typedefs in *objects* refer to,
+            but which are not in *objects* themselves.
+        """
+        for typedef_tag, compound in self.compounds.iteritems():
+            if compound not in objects:
+                # the typedef might be gone or replaced.
+                obj = objects.get(typedef_tag)
+                if (obj is not None and obj['class'] == 'Typedef'
+                    and find_compound(obj['target']) == compound):
+                    yield compound
+
+def clear_caches():
+    """
+        Forget all parsed tags.
+    """
+    _parsed.clear()
+    _first_arguments.clear()
+    _compounds.clear()
+    _embedded.clear()
+    _subtags.clear()
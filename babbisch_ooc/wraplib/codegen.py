@@ -14,10 +14,28 @@ INDENT = _Indent()
 DEDENT = _Dedent()
 
 class Codegen(object):
-    def __init__(self):
-        self.buf = ''
+    """
+        Turns codegens and lines into indented source code. The code is
+        written to *out*, which can be any object with a `write` method
+        (a file, a socket's file object, ...), as soon as it is generated.
+        If *out* is None, it is collected in memory and available as `buf`.
+    """
+    def __init__(self, out=None):
+        if out is None:
+            out = StringIO()
+        self.out = out
         self.indent_level = 0
 
+    @property
+    def buf(self):
+        """
+            All code generated so far. Only available if no *out* was given.
+        """
+        return self.out.getvalue()
+
+    def write(self, string):
+        self.out.write(string)
+
     def __call__(self, fmt=''):
         if callable(fmt): # callable. call.
             self(fmt())
@@ -35,9 +53,9 @@ class Codegen(object):
             self.dedent()
         else:
             if not fmt:
-                self.buf += '\n' # no unneeded indentation spaces
+                self.write('\n') # no unneeded indentation spaces
             else:
-                self.buf += '    ' * self.indent_level + fmt + '\n'
+                self.write('    ' * self.indent_level + fmt + '\n')
         return self
 
     def indent(self, level=1):
@@ -1,7 +1,143 @@
 from babbisch.odict import odict
 from .codegen import CodegenBase, INDENT, DEDENT
 
-class Function(CodegenBase):
+class Named(CodegenBase):
+    """
+        Codegen with a `name`. Renaming it makes the `Members` lists that
+        have it in their name index rebuild it the next time they are
+        asked.
+    """
+    def _get_name(self):
+        return self._name
+
+    def _set_name(self, name):
+        if self.__dict__.get('_name', name) != name:
+            for members in self.__dict__.get('_indexed_in', ()):
+                members._by_name = None
+        self._name = name
+
+    name = property(_get_name, _set_name)
+
+    def _add_index(self, members):
+        """
+            Remember that the `Members` list *members* has indexed us.
+        """
+        indexed_in = self.__dict__.setdefault('_indexed_in', [])
+        for other in indexed_in:
+            if other is members:
+                return
+        indexed_in.append(members)
+
+    def __getstate__(self):
+        # the lists are not ours to copy.
+        state = self.__dict__.copy()
+        state.pop('_indexed_in', None)
+        return state
+
+class Members(list):
+    """
+        List of members that can also look up members by name in O(1).
+        If there are multiple members of the same name, the first one is
+        found; the others are listed in `duplicates`.
+
+        The name index is built on the first lookup and kept up to date
+        on `append`; any other change, including renaming a `Named`
+        member, makes the next lookup rebuild it.
+    """
+    def __init__(self, members=()):
+        list.__init__(self, members)
+        self._by_name = None
+
+    def _reindex(self):
+        self._by_name = {}
+        self._duplicates = []
+        for member in self:
+            self._index(member)
+
+    def _index(self, member):
+        if isinstance(member, Named):
+            member._add_index(self)
+        name = getattr(member, 'name', None)
+        if name is None:
+            return
+        elif name in self._by_name:
+            self._duplicates.append(member)
+        else:
+            self._by_name[name] = member
+
+    def _get_index(self):
+        if self._by_name is None:
+            self._reindex()
+        return self._by_name
+
+    @property
+    def duplicates(self):
+        """
+            list of members whose names are already taken by earlier members.
+        """
+        self._get_index()
+        return self._duplicates
+
+    def __reduce__(self):
+        return (Members, (list(self),))
+
+    def get(self, name):
+        """
+            Return the (first) member named *name* or raise a `KeyError`.
+        """
+        return self._get_index()[name]
+
+    def has_name(self, name):
+        return name in self._get_index()
+
+    def append(self, member):
+        list.append(self, member)
+        if self._by_name is not None:
+            self._index(member)
+
+    def extend(self, members):
+        for member in members:
+            self.append(member)
+
+    def __iadd__(self, members):
+        self.extend(members)
+        return self
+
+    # Everything else might change which member comes first.
+    def _invalidating(name):
+        method = getattr(list, name)
+        def invalidating(self, *args):
+            result = method(self, *args)
+            self._by_name = None
+            return result
+        invalidating.__name__ = name
+        return invalidating
+
+    insert = _invalidating('insert')
+    remove = _invalidating('remove')
+    pop = _invalidating('pop')
+    sort = _invalidating('sort')
+    reverse = _invalidating('reverse')
+    __setitem__ = _invalidating('__setitem__')
+    __delitem__ = _invalidating('__delitem__')
+    __setslice__ = _invalidating('__setslice__')
+    __delslice__ = _invalidating('__delslice__')
+    __imul__ = _invalidating('__imul__')
+    del _invalidating
+
+def _members_property():
+    """
+        Return a property that makes sure `members` is a `Members` list.
+    """
+    def fget(self):
+        return self._members
+    def fset(self, members):
+        if not isinstance(members, Members):
+            members = Members(members)
+        self._members = members
+    return property(fget, fset, doc='`Members` list of all members.')
+
+class Function(Named):
     def __init__(self, name, modifiers=None, args=None, rettype=None, code=None):
         if modifiers is None:
             modifiers = []
@@ -47,7 +183,7 @@ class Function(CodegenBase):
 class Method(Function):
     pass
 
-class Attribute(CodegenBase):
+class Attribute(Named):
     def __init__(self, name, typename, value=''):
         self.name = name
         self.typename = typename
@@ -59,7 +195,7 @@ class Attribute(CodegenBase):
             line += ' = %s' % self.value
         return line
 
-class Property(CodegenBase):
+class Property(Named):
     def __init__(self, name, typename, getter=None, setter=None, static=False):
         self.name = name
         self.typename = typename
@@ -100,18 +236,13 @@ class Cover(CodegenBase):
         self.modifiers = modifiers
         self.extends = extends
 
+    members = _members_property()
+
     def get_member_by_name(self, name):
-        for member in self.members:
-            if member.name == name:
-                return member
-        raise KeyError(name)
+        return self.members.get(name)
 
     def has_member(self, name):
-        try:
-            self.get_member_by_name(name)
-            return True
-        except KeyError:
-            return False
+        return self.members.has_name(name)
 
     def generate_code(self):
         if self.modifiers:
@@ -139,18 +270,13 @@ class Class(CodegenBase):
         self.members = []
         self.extends = extends
 
+    members = _members_property()
+
     def get_member_by_name(self, name):
-        for member in self.members:
-            if member.name == name:
-                return member
-        raise KeyError(name)
+        return self.members.get(name)
 
     def has_member(self, name):
-        try:
-            self.get_member_by_name(name)
-            return True
-        except KeyError:
-            return False
+        return self.members.has_name(name)
 
     def generate_code(self):
         line = '%s: class' % self.name
@@ -0,0 +1,12 @@
+"""
+    Benchmarks for babbisch-ooc. Run them from the repository root:
+
+    ``python -m bench.names``
+        micro-benchmark of the name mangling functions
+    ``python -m bench.corpus SIZE DIRECTORY``
+        write a synthetic babbisch json file and YAML interface
+    ``python -m bench.pipeline``
+        time the whole pipeline phase by phase on synthetic corpora
+    ``python -m bench.startup``
+        time importing babbisch_ooc and running it on a tiny interface
+"""
@@ -0,0 +1,246 @@
+"""
+    Synthetic babbisch corpora: a json file describing a GObject-style C
+    library and a matching YAML interface.
+
+    The library has classes (a struct, a typedef to it and a pointer
+    typedef chain, constructors, methods, getter/setter properties and
+    checked functions), plus free-standing structs, unions, enums, opaque
+    typedefs, functions and some compiler builtins and system header
+    objects, like in real babbisch-gccxml dumps.
+
+    Usage::
+
+        python -m bench.corpus SIZE DIRECTORY
+"""
+import os
+import sys
+import random
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+PRIMITIVES = ['int', 'unsigned int', 'char', 'double', 'float', 'long int',
+              'short int', 'unsigned char', 'size_t']
+
+WORDS = ('widget window item list buffer node value data entry cell view '
+         'icon size text color path file stream event key signal').split()
+
+class CorpusBuilder(object):
+    """
+        Builds a corpus of about *size* babbisch objects.
+    """
+    def __init__(self, size, seed=0, headers=20):
+        self.size = size
+        self.rng = random.Random(seed)
+        self.headers = ['/usr/include/bench/%s%d.h' % (self.rng.choice(WORDS), i)
+                        for i in xrange(headers)]
+        #: list of (tag, object) pairs.
+        self.pairs = []
+        #: tags of types that can be used as argument and member types.
+        self.types = list(PRIMITIVES)
+        #: list of (class name, function prefix, this tag, struct type, property names) tuples.
+        self.classes = []
+        self._counter = 0
+
+    def _coord(self, header=None):
+        self._counter += 1
+        if header is None:
+            header = self.rng.choice(self.headers)
+        return {'file': header, 'line': self._counter}
+
+    def _add(self, tag, obj):
+        obj['tag'] = tag
+        self.pairs.append((tag, obj))
+
+    def _type(self):
+        rng = self.rng
+        r = rng.random()
+        base = rng.choice(self.types)
+        if r < 0.4:
+            return base
+        elif r < 0.7:
+            return 'POINTER(%s)' % base
+        elif r < 0.8:
+            return 'POINTER(CONST(char))'
+        elif r < 0.85:
+            return 'POINTER(FUNCTIONTYPE(int, POINTER(void)))'
+        elif r < 0.9:
+            return 'ARRAY(%s, %d)' % (rng.choice(PRIMITIVES), rng.randint(1, 16))
+        else:
+            return 'POINTER(POINTER(%s))' % base
+
+    def _arguments(self, count):
+        # `!by_tag` matchers look at the first argument, and they raise
+        # an error if their name regex doesn't match. So that's never a
+        # class pointer.
+        arguments = [['arg%d' % i, self._type()] for i in xrange(count)]
+        if arguments:
+            arguments[0][1] = self.rng.choice(PRIMITIVES)
+        return arguments
+
+    def _function(self, name, arguments, rettype='void', header=None):
+        self._add(name, {
+            'class': 'Function',
+            'name': name,
+            'arguments': arguments,
+            'rettype': rettype,
+            'varargs': False,
+            'storage': ['extern'],
+            'coord': self._coord(header),
+        })
+
+    def _struct(self, name, header=None, cls='Struct'):
+        tag = '%s(%s)' % (cls.upper(), name)
+        members = []
+        for i in xrange(self.rng.randint(1, 6)):
+            member = ['%s_%d' % (self.rng.choice(WORDS), i), self._type()]
+            if cls == 'Struct':
+                member.append(None)
+            members.append(member)
+        self._add(tag, {
+            'class': cls,
+            'name': name,
+            'members': members,
+            'coord': self._coord(header),
+        })
+        return tag
+
+    def add_class(self, idx):
+        rng = self.rng
+        header = rng.choice(self.headers)
+        word = rng.choice(WORDS)
+        prefix = 'bench_%s%d' % (word, idx)
+        name = 'Bench%s%d' % (word.capitalize(), idx)
+        struct = self._struct('_' + name, header)
+        self._add(name, {'class': 'Typedef', 'target': struct, 'coord': self._coord(header)})
+        # a typedef chain
+        self._add(name + 'Ptr', {'class': 'Typedef', 'target': 'POINTER(%s)' % name,
+                                 'coord': self._coord(header)})
+        this = ['self', 'POINTER(%s)' % name]
+        self._function(prefix + '_new', self._arguments(rng.randint(0, 3)),
+                       'POINTER(%s)' % name, header)
+        self._function(prefix + '_free', [this], 'void', header)
+        properties = []
+        for i in xrange(rng.randint(0, 2)):
+            prop = '%s_%d' % (rng.choice(WORDS), i)
+            properties.append(prop)
+            type = self._type()
+            self._function('%s_get_%s' % (prefix, prop), [this], type, header)
+            self._function('%s_set_%s' % (prefix, prop), [this, ['value', type]], 'void', header)
+        for i in xrange(rng.randint(1, 8)):
+            self._function('%s_do_%s_%d' % (prefix, rng.choice(WORDS), i),
+                           [this] + [['arg%d' % j, self._type()] for j in xrange(rng.randint(0, 3))],
+                           self._type(), header)
+        # checked functions return status codes
+        self._function('%s_try_%s' % (prefix, rng.choice(WORDS)), [this], 'int', header)
+        self.classes.append((name, prefix, 'POINTER(%s)' % name, 'Struct_%s*' % name, properties))
+        self.types.append(name)
+
+    def add_free_standing(self, idx):
+        rng = self.rng
+        r = rng.random()
+        word = rng.choice(WORDS)
+        if r < 0.15:
+            self.types.append(self._struct('bench_%s_s%d' % (word, idx)))
+        elif r < 0.25:
+            self.types.append(self._struct('bench_%s_u%d' % (word, idx), cls='Union'))
+        elif r < 0.35:
+            upper = 'BENCH_%s%d' % (word.upper(), idx)
+            self._add('ENUM(bench_%s_e%d)' % (word, idx), {
+                'class': 'Enum',
+                'name': 'bench_%s_e%d' % (word, idx),
+                'members': [['%s_%s' % (upper, w.upper()), i] for i, w in enumerate(rng.sample(WORDS, 4))],
+                'coord': self._coord(),
+            })
+        elif r < 0.45:
+            # opaque type
+            name = 'BenchOpaque%d' % idx
+            self._add(name, {'class': 'Typedef', 'target': 'STRUCT(_%s)' % name,
+                             'coord': self._coord()})
+            self.types.append(name)
+        elif r < 0.5:
+            # system headers and builtins
+            self._function('__builtin_%s%d' % (word, idx), [['x', 'double']], 'double',
+                           '/usr/share/gccxml-0.9/GCC/4.3/gccxml_builtins.h')
+        elif r < 0.55:
+            self.types.append(self._struct('_sys_%s%d' % (word, idx), '/usr/include/bits/types.h'))
+        else:
+            self._function('bench_%s_util%d' % (word, idx),
+                           self._arguments(rng.randint(0, 4)),
+                           self._type())
+
+    def build(self):
+        """
+            Generate the objects. Return `self.pairs`.
+        """
+        idx = 0
+        while len(self.pairs) < self.size:
+            if self.rng.random() < 0.05:
+                self.add_class(idx)
+            else:
+                self.add_free_standing(idx)
+            idx += 1
+        return self.pairs
+
+    def interface(self, json_filename):
+        """
+            Return the YAML interface for the corpus (as string).
+        """
+        lines = ['Files:', '    - %s' % json_filename, '', 'Objects:']
+        for name, prefix, this_tag, type, properties in self.classes:
+            lines.extend([
+                '    %s:' % name,
+                "        tag: '%s'" % this_tag,
+                "        type: '%s'" % type,
+                '        methods:',
+                '            - !by_tag',
+                "              tag: '%s'" % this_tag,
+                '              this_idx: 0',
+                "              name_regex: '%s_(.*)'" % prefix,
+                '        static_methods:',
+                "            - !by_name '%s_(new)'" % prefix,
+            ])
+            if properties:
+                lines.append('        properties:')
+                for prop in properties:
+                    lines.extend([
+                        '            %s:' % prop,
+                        '                type: Pointer',
+                        '                getter: %s_get_%s' % (prefix, prop),
+                        '                setter: %s_set_%s' % (prefix, prop),
+                    ])
+        lines.extend([
+            '',
+            'Errors:',
+            '    names: [BENCH_ERROR_FAILED, BENCH_ERROR_INVALID]',
+            '    functions:',
+            "        - !by_name 'bench_.*_(try_.*)'",
+            '',
+        ])
+        return '\n'.join(lines)
+
+def write_corpus(size, directory, seed=0):
+    """
+        Write ``api.json`` and ``api.yaml`` with about *size* objects to
+        *directory* and return the filename of the interface.
+    """
+    builder = CorpusBuilder(size, seed)
+    pairs = builder.build()
+    json_filename = os.path.abspath(os.path.join(directory, 'api.json'))
+    yaml_filename = os.path.join(directory, 'api.yaml')
+    with open(json_filename, 'w') as f:
+        json.dump(pairs, f)
+    with open(yaml_filename, 'w') as f:
+        f.write(builder.interface(json_filename))
+    return yaml_filename
+
+def main():
+    if len(sys.argv) != 3:
+        print 'Usage: python -m bench.corpus SIZE DIRECTORY'
+        return 1
+    print write_corpus(int(sys.argv[1]), sys.argv[2])
+
+if __name__ == '__main__':
+    sys.exit(main())
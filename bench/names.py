@@ -0,0 +1,101 @@
+"""
+    Micro-benchmark of the name mangling functions in `babbisch_ooc.names`
+    on a GTK-like identifier corpus.
+
+    It compares the current implementation (with and without a warm memo
+    cache) to the regex-based reference implementation it replaced.
+"""
+import re
+import sys
+import random
+import timeit
+
+from babbisch_ooc import names
+
+WORDS = ('widget window get set show all new free ref unref data user '
+         'signal connect list append prepend foreach default name type '
+         'class init if do for string value child parent icon size '
+         'text buffer iter insert remove event key button').split()
+
+PREFIXES = ('gtk', 'gdk', 'g', 'pango', 'cairo', 'atk')
+
+def make_corpus(size, seed=0):
+    """
+        Return a list of *size* identifiers. Like in real APIs, most of
+        them appear many times (argument names, common types).
+    """
+    rng = random.Random(seed)
+    distinct = []
+    for i in xrange(size // 10 or 1):
+        words = [rng.choice(WORDS) for _ in xrange(rng.randint(1, 4))]
+        prefix = rng.choice(PREFIXES)
+        style = rng.randint(0, 3)
+        if style == 0: # function
+            distinct.append('_'.join([prefix] + words))
+        elif style == 1: # type
+            distinct.append(prefix.capitalize() + ''.join(w.capitalize() for w in words))
+        elif style == 2: # private type
+            distinct.append('_' + prefix.capitalize() + ''.join(w.capitalize() for w in words))
+        else: # enum value
+            distinct.append('_'.join([prefix] + words).upper())
+    return [rng.choice(distinct) for _ in xrange(size)]
+
+def _reference_oocize_name(name):
+    if not name:
+        return '_'
+    name = re.sub('^([A-Z]+)', lambda m: m.group(1).lower(), name)
+    underscored = name.startswith('_') or name[0].isdigit()
+    name = re.sub('_([^_]*)', lambda m: names.upper_first(_reference_oocize_name(m.group(1))), name)
+    if underscored:
+        name = '_' + name
+    return _reference_censor(name)
+
+def _reference_oocize_type(name):
+    if not name:
+        return '_'
+    underscored = name.startswith('_') or name[0].isdigit()
+    name = re.sub('_([^_]*)', lambda m: names.upper_first(_reference_oocize_name(m.group(1))), name)
+    if underscored:
+        name = '_' + name
+    return _reference_censor(names.upper_first(name))
+
+def _reference_censor(name):
+    if name in names.KEYWORDS:
+        return _reference_censor(name + '_')
+    else:
+        return name
+
+def _run(oocize_name, oocize_type, corpus, clear=None):
+    if clear is not None:
+        clear()
+    for name in corpus:
+        oocize_name(name)
+        oocize_type(name)
+
+def _clear_caches():
+    names.oocize_name.cache.clear()
+    names.oocize_type.cache.clear()
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeat = 3
+    corpus = make_corpus(size)
+    # make sure both implementations agree.
+    for name in corpus:
+        assert names.oocize_name(name) == _reference_oocize_name(name), name
+        assert names.oocize_type(name) == _reference_oocize_type(name), name
+    cases = [
+        ('reference', lambda: _run(_reference_oocize_name, _reference_oocize_type, corpus)),
+        ('cold cache', lambda: _run(names.oocize_name, names.oocize_type, corpus, _clear_caches)),
+        ('warm cache', lambda: _run(names.oocize_name, names.oocize_type, corpus)),
+    ]
+    print '%d identifiers, best of %d' % (size, repeat)
+    baseline = None
+    for label, func in cases:
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        if baseline is None:
+            baseline = best
+        print '%-12s %8.3fs  %6.1fx' % (label, best, baseline / best)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+    End-to-end benchmark: generate synthetic corpora of different sizes
+    (see :mod:`bench.corpus`), run babbisch-ooc on them and report the
+    time spent in each phase of `OOClient.run` and the peak memory.
+
+    Usage::
+
+        python -m bench.pipeline [--sizes 1000,10000,100000] [--output report.json]
+
+    Each size runs in a fresh process, so the peak memory numbers don't
+    influence each other.
+"""
+import os
+import sys
+import time
+import shutil
+import resource
+import tempfile
+import subprocess
+from optparse import OptionParser, SUPPRESS_HELP
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from babbisch_ooc import OOClient, load_interface
+from babbisch_ooc.loader import load_files
+from babbisch_ooc.tags import TypedefIndex
+
+from .corpus import write_corpus
+
+def peak_memory():
+    """
+        Return the peak resident memory of this process in KiB.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_pipeline(interface_filename, jobs=1):
+    """
+        Run babbisch-ooc on *interface_filename*, discarding the output.
+        Return a list of (phase, seconds) tuples.
+    """
+    timings = []
+    def timed(phase, func, *args):
+        start = time.time()
+        result = func(*args)
+        timings.append((phase, time.time() - start))
+        return result
+
+    with open(interface_filename, 'r') as f:
+        interface = timed('yaml', load_interface, f)
+    typedefs = TypedefIndex()
+    objects = timed('load', load_files, interface['Files'], jobs, typedefs)
+    client = timed('settings', OOClient, objects, interface, None, typedefs)
+    for stage in client.STAGES:
+        timed(stage, getattr(client, stage))
+    with open(os.devnull, 'w') as out:
+        timed('generate_code', client.generate_code, out)
+    return timings
+
+def bench_interface(interface_filename, jobs=1):
+    """
+        Run the pipeline on *interface_filename* in this process and
+        return a report dictionary.
+    """
+    timings = run_pipeline(interface_filename, jobs)
+    return {
+        'phases': timings,
+        'total': sum(seconds for phase, seconds in timings),
+        'peak_memory_kib': peak_memory(),
+    }
+
+def bench_size(size, seed=0, jobs=1):
+    """
+        Generate a corpus of *size* objects, run the pipeline on it in a
+        fresh process and return a report dictionary.
+    """
+    directory = tempfile.mkdtemp(prefix='babbisch-ooc-bench-')
+    try:
+        interface_filename = write_corpus(size, directory, seed)
+        # the json cache goes to the corpus directory, too.
+        output = subprocess.check_output([sys.executable, '-m', 'bench.pipeline',
+            '--single', interface_filename, '--jobs', str(jobs)],
+            env=dict(os.environ, XDG_CACHE_HOME=directory))
+        report = json.loads(output)
+        report['size'] = size
+        report['json_bytes'] = os.path.getsize(os.path.join(directory, 'api.json'))
+    finally:
+        shutil.rmtree(directory)
+    return report
+
+def main():
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('--sizes', default='1000,10000,100000',
+            help='comma-separated corpus sizes (number of objects)')
+    parser.add_option('--seed', type='int', default=0)
+    parser.add_option('-j', '--jobs', type='int', default=1)
+    parser.add_option('--output', metavar='FILE', help='write a json report to FILE')
+    parser.add_option('--single', metavar='INTERFACE', help=SUPPRESS_HELP)
+    options, args = parser.parse_args()
+
+    if options.single is not None:
+        json.dump(bench_interface(options.single, options.jobs), sys.stdout)
+        return 0
+
+    reports = []
+    for size in map(int, options.sizes.split(',')):
+        report = bench_size(size, options.seed, options.jobs)
+        reports.append(report)
+        print '%d objects (%.1f MiB json): %.2fs, peak memory %.1f MiB' % (
+                size, report['json_bytes'] / 1048576.0, report['total'],
+                report['peak_memory_kib'] / 1024.0)
+        for phase, seconds in report['phases']:
+            print '    %-20s %8.3fs' % (phase, seconds)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
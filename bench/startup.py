@@ -0,0 +1,102 @@
+"""
+    Startup benchmark: how long it takes to import babbisch_ooc, and to
+    run babbisch-ooc on a tiny interface, each in a fresh interpreter.
+    Build systems call babbisch-ooc over and over again for small
+    interfaces, so this is mostly interpreter and import time.
+
+    Usage::
+
+        python -m bench.startup [--runs 20] [--size 50] [--output report.json]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from optparse import OptionParser
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from .corpus import write_corpus
+
+#: Prints the number of imported modules after importing babbisch_ooc.
+IMPORT_SCRIPT = 'import sys, babbisch_ooc; print len(sys.modules)'
+
+#: Runs babbisch-ooc like the console script does.
+RUN_SCRIPT = ('import sys, babbisch_ooc; sys.argv[0] = "babbisch-ooc"; '
+              'sys.exit(babbisch_ooc.main())')
+
+def time_command(args, runs, env=None):
+    """
+        Run *args* *runs* times (in the environment *env*, if given) and
+        return a sorted list of the wall times, and the output of the
+        last run.
+    """
+    times = []
+    with open(os.devnull, 'w') as devnull:
+        for i in xrange(runs):
+            start = time.time()
+            output = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=devnull,
+                                      env=env).communicate()[0]
+            times.append(time.time() - start)
+    times.sort()
+    return times, output
+
+def summarize(times):
+    return {
+        'min': times[0],
+        'median': times[len(times) // 2],
+        'max': times[-1],
+    }
+
+def bench_startup(runs=20, size=50, seed=0):
+    """
+        Return a report dictionary.
+    """
+    report = {}
+    times, output = time_command([sys.executable, '-c', 'pass'], runs)
+    report['interpreter'] = summarize(times)
+    times, output = time_command([sys.executable, '-c', IMPORT_SCRIPT], runs)
+    report['import'] = summarize(times)
+    report['modules'] = int(output)
+    directory = tempfile.mkdtemp(prefix='babbisch-ooc-bench-')
+    try:
+        interface_filename = write_corpus(size, directory, seed)
+        output_filename = os.path.join(directory, 'api.ooc')
+        # no options but -o: measure what a plain invocation costs.
+        args = [sys.executable, '-c', RUN_SCRIPT, interface_filename,
+                '-o', output_filename]
+        # keep the json cache out of the user's cache directory.
+        env = dict(os.environ, XDG_CACHE_HOME=directory)
+        # the first run writes the json cache.
+        time_command(args, 1, env)
+        times, output = time_command(args, runs, env)
+        report['run'] = summarize(times)
+    finally:
+        shutil.rmtree(directory)
+    return report
+
+def main():
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('--runs', type='int', default=20)
+    parser.add_option('--size', type='int', default=50,
+            help='number of objects in the interface')
+    parser.add_option('--output', metavar='FILE', help='write a json report to FILE')
+    options, args = parser.parse_args()
+
+    report = bench_startup(options.runs, options.size)
+    print '%d modules imported' % report['modules']
+    for name in ('interpreter', 'import', 'run'):
+        print '%-12s min %6.1fms  median %6.1fms' % (
+                name, report[name]['min'] * 1000, report[name]['median'] * 1000)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,15 @@
+/* DropHeaders regression: a kept struct contains dropped ones by value,
+ * and a kept function takes a dropped typedef (of a dropped typedef).
+ * drop.json is written by hand, pretending that struct _sys_data,
+ * sys_data, union _sys_value, sys_long and sys_off come from
+ * /usr/include/bits/types.h. */
+
+typedef struct _Holder {
+	struct _sys_data data;
+	sys_data *pointer;
+	union _sys_value values[2];
+} Holder;
+
+void holder_set(Holder *self, struct _sys_data data);
+struct _sys_data holder_get(Holder *self);
+void holder_seek(Holder *self, sys_off off);